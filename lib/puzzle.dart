@@ -0,0 +1,7 @@
+/// Класс одной головоломки судоку
+class Puzzle {
+  final List<int> board;    // стартовая доска (0 = пустая клетка)
+  final List<int> solution; // правильное решение
+
+  const Puzzle(this.board, this.solution);
+}
@@ -0,0 +1,91 @@
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from itertools import islice, repeat
+from typing import Iterable, Iterator, List, TextIO, Tuple
+
+from bitmask_solver import SHAPES_BY_CELLS
+from solvers import DEFAULT_SOLVER, get_solver
+
+CHUNK_LINES = 4096
+BLANKS = "0."
+DIGITS = "123456789"
+
+
+def parse_board(line: str) -> List[int] | None:
+    # One character per cell, so only sizes whose digits fit in one: 4x4,
+    # 6x6 and 9x9 boards, told apart by length.
+    text = line.strip()
+    shape = SHAPES_BY_CELLS.get(len(text))
+    if shape is None or shape.side > 9:
+        return None
+    # ASCII digits only: str.isdigit() also accepts characters such as "²"
+    # that int() rejects.
+    digits = DIGITS[: shape.side]
+    board = []
+    for char in text:
+        if char in BLANKS:
+            board.append(0)
+        elif char in digits:
+            board.append(int(char))
+        else:
+            return None
+    return board
+
+
+def check_board(line: str, limit: int = 2, solver: str = DEFAULT_SOLVER) -> str:
+    # One tab-separated result per input line: the board as given, the
+    # solution count capped at `limit`, the first solution (or "-") and the
+    # solve time in milliseconds. Unparseable lines get count "invalid".
+    text = line.strip()
+    board = parse_board(text)
+    if board is None:
+        return f"{text}\tinvalid\t-\t0.000"
+    started = time.perf_counter()
+    solutions = get_solver(solver).find_solutions(board, limit)
+    elapsed = (time.perf_counter() - started) * 1000
+    solution = "".join(map(str, solutions[0])) if solutions else "-"
+    return f"{text}\t{len(solutions)}\t{solution}\t{elapsed:.3f}"
+
+
+def chunks(lines: Iterable[str], size: int = CHUNK_LINES) -> Iterator[List[str]]:
+    iterator = iter(line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def solve_stream(
+    lines: Iterable[str],
+    out: TextIO = sys.stdout,
+    limit: int = 2,
+    solver: str = DEFAULT_SOLVER,
+    workers: int | None = None,
+    unique_only: bool = False,
+) -> Tuple[int, int]:
+    # Reads and writes a chunk of CHUNK_LINES boards at a time; with workers
+    # every chunk is spread over the process pool and comes back in input
+    # order. Returns how many boards were checked and how many were unique.
+    checked = unique = 0
+    with ProcessPoolExecutor(max_workers=workers) if workers else nullcontext() as executor:
+        for chunk in chunks(lines):
+            if executor is not None:
+                results = executor.map(
+                    check_board, chunk, repeat(limit), repeat(solver), chunksize=max(1, len(chunk) // (workers * 4))
+                )
+            else:
+                results = map(check_board, chunk, repeat(limit), repeat(solver))
+            block = []
+            for result in results:
+                checked += 1
+                if result.split("\t", 2)[1] == "1":
+                    unique += 1
+                elif unique_only:
+                    continue
+                block.append(result)
+            if block:
+                out.write("\n".join(block) + "\n")
+    return checked, unique
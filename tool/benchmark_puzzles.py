@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import math
+import platform
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from bitmask_solver import CLASSIC, SHAPES, count_solutions
+from grid_pool import GridPool, build_pool, random_grid
+from generate_puzzles import (
+    CARVE_STRATEGIES,
+    build_output,
+    default_configs,
+    generate_solution,
+    make_puzzle,
+    task_rng,
+)
+from solvers import SOLVERS
+
+CORPUS_FILE = Path(__file__).with_name("bench_corpus.json")
+CORPUS_SEED = 20240917
+CORPUS_KINDS = ("unique", "near_ambiguous", "multi")
+
+
+def to_line(board: Sequence[int]) -> str:
+    return "".join(str(value) for value in board)
+
+
+def from_line(line: str) -> List[int]:
+    return [int(char) for char in line]
+
+
+def minimise(board: List[int]) -> List[int]:
+    minimal = board[:]
+    for pos in range(len(minimal)):
+        if minimal[pos] == 0:
+            continue
+        saved = minimal[pos]
+        minimal[pos] = 0
+        if count_solutions(minimal, limit=2) != 1:
+            minimal[pos] = saved
+    return minimal
+
+
+def build_corpus(per_tier: int) -> List[Dict[str, object]]:
+    # Every tier contributes its carved puzzles, the same puzzles reduced to
+    # minimal (every given essential, so the uniqueness proof is as hard as
+    # it gets), and the minimal puzzles with one more given removed, which
+    # have several solutions.
+    entries: List[Dict[str, object]] = []
+    for cfg in default_configs():
+        index = 0
+        found = 0
+        while found < per_tier:
+            rng = task_rng(CORPUS_SEED, "corpus", cfg.name, index)
+            index += 1
+            solution = generate_solution(rng)
+            puzzle = make_puzzle(solution, cfg.givens, rng=rng)
+            if puzzle is None:
+                continue
+            found += 1
+            minimal = minimise(puzzle)
+            ambiguous = minimal[:]
+            ambiguous[rng.choice([pos for pos, value in enumerate(minimal) if value])] = 0
+            for kind, board in zip(CORPUS_KINDS, (puzzle, minimal, ambiguous)):
+                entries.append(
+                    {"tier": cfg.name, "kind": kind, "board": to_line(board), "solution": to_line(solution)}
+                )
+    return entries
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> List[Dict[str, object]]:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    p95 = ordered[max(0, math.ceil(len(ordered) * 0.95) - 1)]
+    return {"median": statistics.median(ordered), "p95": p95, "samples": len(ordered)}
+
+
+def timed(call: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    call()
+    return time.perf_counter() - start
+
+
+def run_benchmarks(corpus: List[Dict[str, object]], repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    configs = default_configs()
+
+    for name, solver in sorted(SOLVERS.items()):
+        for kind in CORPUS_KINDS:
+            for cfg in configs:
+                boards = [
+                    from_line(str(entry["board"]))
+                    for entry in corpus
+                    if entry["tier"] == cfg.name and entry["kind"] == kind
+                ]
+                samples = [
+                    timed(lambda board=board: solver.count_solutions(board, limit=2))
+                    for _ in range(repeat)
+                    for board in boards
+                ]
+                results[f"count_solutions/{name}/{kind}/{cfg.name}"] = summarize(samples)
+
+    for strategy in CARVE_STRATEGIES:
+        for cfg in configs:
+            solutions = [
+                from_line(str(entry["solution"]))
+                for entry in corpus
+                if entry["tier"] == cfg.name and entry["kind"] == "unique"
+            ]
+            samples = []
+            for round_index in range(repeat):
+                for index, solution in enumerate(solutions):
+                    rng = task_rng(CORPUS_SEED, "bench", cfg.name, round_index, index)
+                    samples.append(
+                        timed(lambda: make_puzzle(solution, cfg.givens, rng=rng, strategy=strategy))
+                    )
+            results[f"make_puzzle/{strategy}/{cfg.name}"] = summarize(samples)
+
+    rng = random.Random(CORPUS_SEED)
+    results["generate_solution"] = summarize([timed(lambda: generate_solution(rng)) for _ in range(200 * repeat)])
+    results["random_grid"] = summarize([timed(lambda: random_grid(rng)) for _ in range(50 * repeat)])
+    for shape in SHAPES.values():
+        if shape == CLASSIC:
+            continue
+        master = default_configs(shape)[-1]
+        samples = []
+        for index in range(repeat):
+            variant_rng = task_rng(CORPUS_SEED, "bench", shape.label, index)
+            solution = random_grid(variant_rng, shape)
+            samples.append(timed(lambda: make_puzzle(solution, master.givens, rng=variant_rng)))
+        results[f"make_puzzle/{shape.label}/master"] = summarize(samples)
+    with tempfile.TemporaryDirectory() as scratch:
+        path = Path(scratch) / "grids.bin"
+        build_pool(path, 200)
+        pool = GridPool(path)
+        results["grid_pool_draw"] = summarize([timed(lambda: pool.draw(rng)) for _ in range(200 * repeat)])
+        pool.close()
+
+    pack: Dict[str, List] = {}
+    for cfg in configs:
+        entries = [
+            (from_line(str(entry["board"])), from_line(str(entry["solution"])))
+            for entry in corpus
+            if entry["tier"] == cfg.name and entry["kind"] == "unique"
+        ]
+        pack[cfg.name] = (entries * (100 // max(1, len(entries)) + 1))[:100]
+    results["build_output"] = summarize([timed(lambda: build_output(pack, configs)) for _ in range(10 * repeat)])
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    regressions = []
+    for name, stats in sorted(results.items()):
+        before = baseline.get(name)
+        if not before or before["median"] <= 0:
+            continue
+        ratio = stats["median"] / before["median"]
+        if ratio > 1 + threshold:
+            regressions.append(f"{name}: median {before['median'] * 1e3:.3f} -> {stats['median'] * 1e3:.3f} ms (x{ratio:.2f})")
+    return regressions
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the puzzle generator and solver hot paths")
+    parser.add_argument("--corpus", type=Path, default=CORPUS_FILE, help="benchmark corpus (JSON)")
+    parser.add_argument("--write-corpus", action="store_true", help="rebuild the corpus file and exit")
+    parser.add_argument("--per-tier", type=int, default=8, help="puzzles per tier when rebuilding the corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="timing rounds over the corpus")
+    parser.add_argument("--output", type=Path, help="write results as JSON")
+    parser.add_argument("--compare", type=Path, help="flag regressions against an earlier results file")
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed median slowdown (default 10%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.write_corpus:
+        corpus = build_corpus(args.per_tier)
+        lines = ",\n".join("  " + json.dumps(entry) for entry in corpus)
+        args.corpus.write_text("[\n" + lines + "\n]\n", encoding="utf-8")
+        print(f"Wrote {len(corpus)} boards to {args.corpus}")
+        return
+
+    results = run_benchmarks(load_corpus(args.corpus), args.repeat)
+    for name, stats in results.items():
+        print(f"{name:50} median {stats['median'] * 1e3:9.3f} ms  p95 {stats['p95'] * 1e3:9.3f} ms")
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("Regression -", line)
+        if regressions:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Sequence, Tuple
+
+
+# A grid of side box_rows * box_cols, split into boxes of box_rows rows by
+# box_cols columns: 2x2 boxes for 4x4, 2x3 for 6x6, 3x3 for the classic
+# grid, 3x4 for 12x12 and 4x4 for 16x16. Candidates are one bit per digit,
+# so every size up to 16 keeps a unit's state in a single small int.
+@dataclass(frozen=True)
+class Shape:
+    box_rows: int
+    box_cols: int
+
+    @property
+    def side(self) -> int:
+        return self.box_rows * self.box_cols
+
+    @property
+    def cells(self) -> int:
+        return self.side * self.side
+
+    @property
+    def all_digits(self) -> int:
+        return (1 << self.side) - 1
+
+    @property
+    def label(self) -> str:
+        return f"{self.side}x{self.side}"
+
+    def box_of(self, row: int, col: int) -> int:
+        return (row // self.box_rows) * self.box_rows + col // self.box_cols
+
+
+SHAPES: Dict[int, Shape] = {
+    shape.side: shape for shape in (Shape(2, 2), Shape(2, 3), Shape(3, 3), Shape(3, 4), Shape(4, 4))
+}
+CLASSIC = SHAPES[9]
+SHAPES_BY_CELLS: Dict[int, Shape] = {shape.cells: shape for shape in SHAPES.values()}
+
+
+def shape_of(board: Sequence[int]) -> Shape:
+    shape = SHAPES_BY_CELLS.get(len(board))
+    if shape is None:
+        raise ValueError(f"no grid shape has {len(board)} cells")
+    return shape
+
+
+# Every cell touches three units: its row, its column and its box. Units are
+# numbered 0..side-1 for rows, then columns, then boxes, so one flat list of
+# side-bit masks holds the whole constraint state.
+@lru_cache(maxsize=None)
+def cell_units(shape: Shape) -> Tuple[Tuple[int, int, int], ...]:
+    side = shape.side
+    return tuple(
+        (index // side, side + index % side, 2 * side + shape.box_of(index // side, index % side))
+        for index in range(shape.cells)
+    )
+
+
+@lru_cache(maxsize=None)
+def unit_cells(shape: Shape) -> Tuple[Tuple[int, ...], ...]:
+    units = cell_units(shape)
+    return tuple(
+        tuple(cell for cell in range(shape.cells) if unit in units[cell]) for unit in range(3 * shape.side)
+    )
+
+
+@lru_cache(maxsize=None)
+def popcounts(shape: Shape) -> Tuple[int, ...]:
+    return tuple(bin(mask).count("1") for mask in range(1 << shape.side))
+
+
+# Looking for hidden singles costs a second pass over the empty cells per
+# node. On 4x4 and 6x6 boards naked singles alone search faster; from the
+# classic grid up the extra pruning pays for itself, and at 16x16 it is what
+# keeps uniqueness checks near minimal boards from running for seconds.
+HIDDEN_SINGLES_FROM = 9
+
+BASE = 3
+SIDE = CLASSIC.side
+BOARD_CELLS = CLASSIC.cells
+ALL_DIGITS = CLASSIC.all_digits
+CELL_UNITS = cell_units(CLASSIC)
+POPCOUNT = popcounts(CLASSIC)
+
+
+# count_solutions result for a search that ran out of its node budget
+# before it could tell whether the board has `limit` solutions.
+UNKNOWN = -1
+
+
+# propagated counts the calls that propagation decided on its own, without
+# branching: a solved board or a contradiction. budget_trips counts the
+# calls that gave up on their node budget.
+@dataclass
+class SearchStats:
+    search_nodes: int = 0
+    propagated: int = 0
+    budget_trips: int = 0
+
+
+def load_masks(board: Sequence[int]) -> Tuple[List[int], List[int]] | None:
+    shape = shape_of(board)
+    units = cell_units(shape)
+    used = [0] * (3 * shape.side)
+    empties: List[int] = []
+    for index, value in enumerate(board):
+        if value == 0:
+            empties.append(index)
+            continue
+        bit = 1 << (value - 1)
+        row, col, box = units[index]
+        if (used[row] | used[col] | used[box]) & bit:
+            return None
+        used[row] |= bit
+        used[col] |= bit
+        used[box] |= bit
+    return used, empties
+
+
+def find_solutions(
+    board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+) -> List[List[int]] | None:
+    # Returns None when the search visits more than `budget` nodes before
+    # finding `limit` solutions; without a budget it always finishes.
+    loaded = load_masks(board)
+    if loaded is None:
+        return []
+    used, empties = loaded
+    total = len(empties)
+    shape = shape_of(board)
+    units = cell_units(shape)
+    members = unit_cells(shape)
+    popcount = popcounts(shape)
+    all_digits = shape.all_digits
+    side = shape.side
+    unit_count = 3 * side
+    hidden_singles = side >= HIDDEN_SINGLES_FROM
+    values = list(board)
+    solutions: List[List[int]] = []
+    nodes = 0
+    node_limit = budget if budget is not None else -1
+    branched = False
+
+    # Every node first propagates: it fills all naked singles, then (from
+    # HIDDEN_SINGLES_FROM up) all hidden singles, and repeats until neither
+    # finds anything. Cells it fills are moved to empties[start:depth],
+    # which is the undo trail cleared before the node returns. Only a board
+    # that propagation cannot finish branches, on the cell with the fewest
+    # candidates left.
+    def search(depth: int) -> None:
+        nonlocal nodes, branched
+        nodes += 1
+        if nodes > node_limit >= 0:
+            return
+        start = depth
+        best_slot = -1
+        best_free = 0
+        while depth < total:
+            progress = False
+            best_size = side + 1
+            for slot in range(depth, total):
+                cell = empties[slot]
+                row, col, box = units[cell]
+                free = all_digits ^ (used[row] | used[col] | used[box])
+                size = popcount[free]
+                if size > 1:
+                    if size < best_size:
+                        best_slot = slot
+                        best_free = free
+                        best_size = size
+                    continue
+                if size == 0:
+                    undo(start, depth)
+                    return
+                empties[slot] = empties[depth]
+                empties[depth] = cell
+                values[cell] = free.bit_length()
+                used[row] |= free
+                used[col] |= free
+                used[box] |= free
+                depth += 1
+                progress = True
+            if progress or depth == total or not hidden_singles:
+                if progress:
+                    continue
+                break
+
+            # once/twice collect the digits seen in at least one/two empty
+            # cells of each unit; a missing digit with no place left is a
+            # dead end, one with a single place is forced there.
+            once = [0] * unit_count
+            twice = [0] * unit_count
+            for slot in range(depth, total):
+                row, col, box = units[empties[slot]]
+                free = all_digits ^ (used[row] | used[col] | used[box])
+                twice[row] |= once[row] & free
+                once[row] |= free
+                twice[col] |= once[col] & free
+                once[col] |= free
+                twice[box] |= once[box] & free
+                once[box] |= free
+            for unit in range(unit_count):
+                if once[unit] | used[unit] != all_digits:
+                    undo(start, depth)
+                    return
+                singles = once[unit] & ~twice[unit]
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    for cell in members[unit]:
+                        if values[cell]:
+                            continue
+                        row, col, box = units[cell]
+                        if (used[row] | used[col] | used[box]) & bit:
+                            continue
+                        slot = empties.index(cell, depth)
+                        empties[slot] = empties[depth]
+                        empties[depth] = cell
+                        values[cell] = bit.bit_length()
+                        used[row] |= bit
+                        used[col] |= bit
+                        used[box] |= bit
+                        depth += 1
+                        progress = True
+                        break
+            if not progress:
+                break
+
+        if depth == total:
+            solutions.append(values[:])
+            undo(start, depth)
+            return
+
+        branched = True
+        cell = empties[best_slot]
+        empties[best_slot] = empties[depth]
+        empties[depth] = cell
+        row, col, box = units[cell]
+        free = best_free
+        while free:
+            bit = free & -free
+            free ^= bit
+            values[cell] = bit.bit_length()
+            used[row] |= bit
+            used[col] |= bit
+            used[box] |= bit
+            search(depth + 1)
+            used[row] ^= bit
+            used[col] ^= bit
+            used[box] ^= bit
+            if len(solutions) >= limit or nodes > node_limit >= 0:
+                break
+        values[cell] = 0
+        undo(start, depth)
+
+    def undo(start: int, depth: int) -> None:
+        for slot in range(start, depth):
+            cell = empties[slot]
+            bit = 1 << (values[cell] - 1)
+            row, col, box = units[cell]
+            used[row] ^= bit
+            used[col] ^= bit
+            used[box] ^= bit
+            values[cell] = 0
+
+    search(0)
+    exhausted = nodes > node_limit >= 0 and len(solutions) < limit
+    if stats is not None:
+        stats.search_nodes += nodes
+        if not branched:
+            stats.propagated += 1
+        if exhausted:
+            stats.budget_trips += 1
+    return None if exhausted else solutions
+
+
+def count_solutions(
+    board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+) -> int:
+    solutions = find_solutions(board, limit, stats, budget)
+    return UNKNOWN if solutions is None else len(solutions)
+
+
+def solve(board: Sequence[int]) -> List[int] | None:
+    solutions = find_solutions(board, limit=1)
+    return solutions[0] if solutions else None
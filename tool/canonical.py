@@ -0,0 +1,125 @@
+from itertools import permutations, product
+from typing import Iterable, List, Sequence, Tuple
+
+from bitmask_solver import BASE, SIDE
+
+# Canonical form under the full validity-preserving symmetry group: digit
+# relabelling, band/stack permutations, row/column permutations inside a
+# band/stack, and transposition. The canonical form is the lexicographically
+# smallest row-major string (blanks sort first, digits relabelled in order of
+# first appearance) over the whole group. It is found row by row, keeping
+# only the partial transforms that tie for the smallest prefix.
+
+State = Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...], Tuple[int, ...], int]
+
+
+def transpose(board: Sequence[int]) -> Tuple[int, ...]:
+    return tuple(board[col * SIDE + row] for row in range(SIDE) for col in range(SIDE))
+
+
+def _first_row_orders(line: Sequence[int]) -> Tuple[Tuple[int, ...], List[Tuple[int, ...]]]:
+    # Digits in a row are distinct, so the relabelled first row only depends
+    # on where its blanks are: the minimum puts emptier stacks first and the
+    # blanks of every stack first. All orders reaching it are kept.
+    stacks = []
+    for stack in range(BASE):
+        cols = range(stack * BASE, stack * BASE + BASE)
+        blanks = [col for col in cols if line[col] == 0]
+        givens = [col for col in cols if line[col] != 0]
+        stacks.append((len(givens), blanks, givens))
+    stacks.sort(key=lambda entry: entry[0])
+
+    key: List[int] = []
+    label = 0
+    for count, _, _ in stacks:
+        key.extend([0] * (BASE - count))
+        for _ in range(count):
+            label += 1
+            key.append(label)
+
+    tied_groups: List[List[int]] = []
+    for index, (count, _, _) in enumerate(stacks):
+        if tied_groups and stacks[tied_groups[-1][0]][0] == count:
+            tied_groups[-1].append(index)
+        else:
+            tied_groups.append([index])
+
+    stack_orders = [
+        [index for group in choice for index in group]
+        for choice in product(*(list(permutations(group)) for group in tied_groups))
+    ]
+    inner_orders = [
+        [tuple(blank) + tuple(given) for blank in permutations(blanks) for given in permutations(givens)]
+        for _, blanks, givens in stacks
+    ]
+    orders: List[Tuple[int, ...]] = []
+    for stack_order in stack_orders:
+        for inner in product(*(inner_orders[index] for index in stack_order)):
+            orders.append(tuple(col for cols in inner for col in cols))
+    return tuple(key), orders
+
+
+def _relabel(
+    grid: Sequence[int], row: int, cols: Sequence[int], mapping: Sequence[int], label: int
+) -> Tuple[Tuple[int, ...], Tuple[int, ...], int]:
+    mapped = list(mapping)
+    line = []
+    base = row * SIDE
+    for col in cols:
+        value = grid[base + col]
+        if value:
+            target = mapped[value]
+            if not target:
+                label += 1
+                mapped[value] = target = label
+            value = target
+        line.append(value)
+    return tuple(line), tuple(mapped), label
+
+
+def canonical_form(board: Sequence[int]) -> bytes:
+    grids = (tuple(board), transpose(board))
+
+    best_key: Tuple[int, ...] | None = None
+    states: List[State] = []
+    for grid in grids:
+        for row in range(SIDE):
+            line = grid[row * SIDE : row * SIDE + SIDE]
+            key, orders = _first_row_orders(line)
+            if best_key is not None and key > best_key:
+                continue
+            if best_key is None or key < best_key:
+                best_key = key
+                states = []
+            for cols in orders:
+                _, mapping, label = _relabel(grid, row, cols, (0,) * (SIDE + 1), 0)
+                states.append((grid, (row,), cols, mapping, label))
+    assert best_key is not None
+    result = list(best_key)
+
+    for depth in range(1, SIDE):
+        best_key = None
+        next_states: List[State] = []
+        for grid, rows, cols, mapping, label in states:
+            if depth % BASE == 0:
+                used_bands = {row // BASE for row in rows}
+                candidates: Iterable[int] = (
+                    row for row in range(SIDE) if row // BASE not in used_bands
+                )
+            else:
+                band = rows[-1] // BASE
+                candidates = (
+                    row for row in range(band * BASE, band * BASE + BASE) if row not in rows
+                )
+            for row in candidates:
+                key, next_mapping, next_label = _relabel(grid, row, cols, mapping, label)
+                if best_key is not None and key > best_key:
+                    continue
+                if best_key is None or key < best_key:
+                    best_key = key
+                    next_states = []
+                next_states.append((grid, rows + (row,), cols, next_mapping, next_label))
+        assert best_key is not None
+        result.extend(best_key)
+        states = next_states
+    return bytes(result)
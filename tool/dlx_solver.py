@@ -0,0 +1,175 @@
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+from bitmask_solver import UNKNOWN, SearchStats, Shape, load_masks, shape_of
+
+# Exact-cover matrix for a grid shape: one candidate row per (cell, digit)
+# and four constraint columns per candidate (cell filled, digit in row,
+# digit in column, digit in box). Node 0 is the root header, nodes
+# 1..4 * cells are column headers and every candidate row owns four
+# consecutive nodes after that.
+Template = Tuple[List[int], List[int], List[int], List[int], List[int], List[int], List[int]]
+
+
+def _candidate_columns(shape: Shape, cell: int, digit: int) -> Tuple[int, int, int, int]:
+    side = shape.side
+    cells = shape.cells
+    row = cell // side
+    col = cell % side
+    box = shape.box_of(row, col)
+    offset = digit - 1
+    return (
+        1 + cell,
+        1 + cells + row * side + offset,
+        1 + 2 * cells + col * side + offset,
+        1 + 3 * cells + box * side + offset,
+    )
+
+
+@lru_cache(maxsize=None)
+def _build_template(shape: Shape) -> Template:
+    column_count = 4 * shape.cells
+    headers = column_count + 1
+    left = [index - 1 for index in range(headers)]
+    right = [index + 1 for index in range(headers)]
+    left[0] = column_count
+    right[column_count] = 0
+    up = list(range(headers))
+    down = list(range(headers))
+    column = list(range(headers))
+    candidate = [-1] * headers
+
+    for cell in range(shape.cells):
+        for digit in range(1, shape.side + 1):
+            first = len(left)
+            for offset, col in enumerate(_candidate_columns(shape, cell, digit)):
+                node = first + offset
+                left.append(first + (offset - 1) % 4)
+                right.append(first + (offset + 1) % 4)
+                up.append(up[col])
+                down.append(col)
+                down[up[col]] = node
+                up[col] = node
+                column.append(col)
+                candidate.append(cell * shape.side + digit - 1)
+
+    size = [0] * headers
+    for node in range(headers, len(column)):
+        size[column[node]] += 1
+    return left, right, up, down, column, candidate, size
+
+
+def find_solutions(
+    board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+) -> List[List[int]] | None:
+    if load_masks(board) is None:
+        return []
+    shape = shape_of(board)
+    side = shape.side
+    column_count = 4 * shape.cells
+    template_left, template_right, template_up, template_down, column, candidate, template_size = (
+        _build_template(shape)
+    )
+    left = template_left[:]
+    right = template_right[:]
+    up = template_up[:]
+    down = template_down[:]
+    size = template_size[:]
+
+    def cover(col: int) -> None:
+        left[right[col]] = left[col]
+        right[left[col]] = right[col]
+        row = down[col]
+        while row != col:
+            node = right[row]
+            while node != row:
+                down[up[node]] = down[node]
+                up[down[node]] = up[node]
+                size[column[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def uncover(col: int) -> None:
+        row = up[col]
+        while row != col:
+            node = left[row]
+            while node != row:
+                size[column[node]] += 1
+                down[up[node]] = node
+                up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        left[right[col]] = col
+        right[left[col]] = col
+
+    values = list(board)
+    for cell, value in enumerate(board):
+        if value == 0:
+            continue
+        first = column_count + 1 + 4 * (cell * side + value - 1)
+        for node in range(first, first + 4):
+            cover(column[node])
+
+    solutions: List[List[int]] = []
+    nodes = 0
+    node_limit = budget if budget is not None else -1
+
+    def search() -> None:
+        nonlocal nodes
+        nodes += 1
+        if nodes > node_limit >= 0:
+            return
+        col = right[0]
+        if col == 0:
+            solutions.append(values[:])
+            return
+
+        best = col
+        best_size = size[col]
+        col = right[col]
+        while col != 0 and best_size > 1:
+            if size[col] < best_size:
+                best = col
+                best_size = size[col]
+            col = right[col]
+        if best_size == 0:
+            return
+
+        cover(best)
+        row = down[best]
+        while row != best:
+            cell, offset = divmod(candidate[row], side)
+            values[cell] = offset + 1
+            node = right[row]
+            while node != row:
+                cover(column[node])
+                node = right[node]
+            search()
+            node = left[row]
+            while node != row:
+                uncover(column[node])
+                node = left[node]
+            if len(solutions) >= limit or nodes > node_limit >= 0:
+                break
+            row = down[row]
+        uncover(best)
+
+    search()
+    exhausted = nodes > node_limit >= 0 and len(solutions) < limit
+    if stats is not None:
+        stats.search_nodes += nodes
+        if exhausted:
+            stats.budget_trips += 1
+    return None if exhausted else solutions
+
+
+def count_solutions(
+    board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+) -> int:
+    solutions = find_solutions(board, limit, stats, budget)
+    return UNKNOWN if solutions is None else len(solutions)
+
+
+def solve(board: Sequence[int]) -> List[int] | None:
+    solutions = find_solutions(board, limit=1)
+    return solutions[0] if solutions else None
@@ -1,13 +1,22 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
+import re
+import sys
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, NamedTuple, Sequence, Tuple, Union
 
 ARB_DIR = Path('lib/l10n')
 OUTPUT_FILE = Path('lib/flutter_gen/gen_l10n/app_localizations.dart')
+CACHE_FILE = Path('tool/.l10n_cache.json')
+CACHE_VERSION = 2
+GENERATOR_SOURCE = Path(__file__)
 
 TYPE_MAP = {
     'int': 'int',
@@ -23,69 +32,271 @@ def load_arb(path: Path) -> OrderedDict[str, object]:
         return json.load(f, object_pairs_hook=OrderedDict)
 
 
-def ordered_placeholder_names(value: str, placeholders: Dict[str, object]) -> List[str]:
-    indices: List[Tuple[int, str]] = []
-    for name in placeholders:
-        marker = '{' + name
-        try:
-            index = value.index(marker)
-        except ValueError:
-            index = len(value)
-        indices.append((index, name))
-    indices.sort()
-    return [name for _, name in indices]
-
-
-def parse_plural(value: str, placeholder: str) -> Tuple[str, Dict[str, str], str]:
-    token = '{' + placeholder + ', plural,'
-    start = value.index(token)
-    prefix = value[:start]
-    depth = 0
-    end = start
-    for idx in range(start, len(value)):
-        char = value[idx]
-        if char == '{':
-            depth += 1
-        elif char == '}':
-            depth -= 1
-            if depth == 0:
-                end = idx
+def read_arb(path: Path) -> Tuple[bytes, str]:
+    data = path.read_bytes()
+    return data, content_hash(data)
+
+
+def decode_arb(data: bytes) -> OrderedDict[str, object] | str:
+    # The decoded ARB, or why it could not be decoded.
+    try:
+        decoded = json.loads(data.decode('utf-8'), object_pairs_hook=OrderedDict)
+    except ValueError as error:
+        return f'Invalid ARB file: {error}'
+    return decoded if isinstance(decoded, OrderedDict) else 'Invalid ARB file: not a JSON object'
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+# The cache remembers, per ARB file, its content hash, its locale and the
+# generated class, and per entry the generated member keyed by a hash of
+# the template entry and the translation. A locale whose ARB file and
+# template are unchanged is reused whole; otherwise only the entries whose
+# text changed are rebuilt. Entries no run asked for are dropped on save.
+# The cache is keyed to a hash of this script as well as CACHE_VERSION, so
+# an edit to the code that renders members throws it away.
+def generator_digest() -> str:
+    return content_hash(GENERATOR_SOURCE.read_bytes())
+
+
+def load_cache(path: Path | None, generator: str) -> Dict[str, object]:
+    empty: Dict[str, object] = {
+        'version': CACHE_VERSION,
+        'generator': generator,
+        'template': None,
+        'locales': {},
+        'entries': {},
+    }
+    if path is None or not path.exists():
+        return empty
+    try:
+        with path.open('r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+    if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+        return empty
+    if cache.get('generator') != generator:
+        return empty
+    return cache
+
+
+def save_cache(path: Path, cache: Dict[str, object]) -> None:
+    write_if_changed(path, json.dumps(cache, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
+def write_if_changed(path: Path, text: str) -> bool:
+    # Leaving an identical file alone keeps its mtime, so the Dart build
+    # does not recompile everything that imports it.
+    data = text.encode('utf-8')
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
+def entry_fingerprint(entry: Dict[str, object]) -> str:
+    fields = [entry['key'], entry['placeholders'], entry['placeholder_order']]
+    return json.dumps(fields, ensure_ascii=False)
+
+
+def entry_hash(entry: Dict[str, object], translation: str) -> str:
+    # The fingerprint is JSON, which escapes NUL, so the separator keeps the
+    # two parts apart.
+    return content_hash((entry['fingerprint'] + '\0' + translation).encode('utf-8'))
+
+
+# Message AST. A message is a tuple of nodes: literal text, an Argument
+# (`{name}`, or `#` inside a plural case, which stands for the plural's
+# argument) or a Choice (`{name, plural, ...}` / `{name, select, ...}`)
+# whose cases are messages themselves, so choices can nest.
+class Argument(NamedTuple):
+    name: str
+
+
+class Choice(NamedTuple):
+    name: str
+    kind: str
+    cases: Tuple[Tuple[str, 'Message'], ...]
+
+
+Node = Union[str, Argument, Choice]
+Message = Tuple[Node, ...]
+
+CHOICE_KINDS = ('plural', 'select')
+PLAIN_TEXT = re.compile(r"[^'{}#]+")
+EXACT_PLURALS = {'=0': 'zero', '=1': 'one', '=2': 'two'}
+
+
+class MessageParser:
+    # One left-to-right pass over the text, plain runs a regex match at a
+    # time. Apostrophes escape the ICU way: '' is a literal apostrophe, and
+    # an apostrophe before a brace (or a # inside a plural case) quotes
+    # everything up to the next lone one. Any other apostrophe is plain
+    # text, so "l'app" needs no escaping.
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.pos = 0
+
+    def error(self, message: str) -> ValueError:
+        return ValueError(f'{message} at offset {self.pos} in {self.text!r}')
+
+    def parse(self) -> Message:
+        message = self.message(None)
+        if self.pos < len(self.text):
+            raise self.error('Unmatched "}"')
+        return message
+
+    def message(self, pound: str | None) -> Message:
+        text = self.text
+        nodes: List[Node] = []
+        chunk: List[str] = []
+        while self.pos < len(text):
+            plain = PLAIN_TEXT.match(text, self.pos)
+            if plain is not None:
+                chunk.append(plain.group())
+                self.pos = plain.end()
+                continue
+            char = text[self.pos]
+            if char == "'":
+                chunk.append(self.apostrophe(pound))
+                continue
+            if char == '}':
                 break
-    block = value[start:end + 1]
-    suffix = value[end + 1:]
-
-    inner = block[len(token):-1]
-    cases: Dict[str, str] = OrderedDict()
-    rest = inner
-    while rest.strip():
-        rest = rest.lstrip()
-        matched = False
-        for category in PLURAL_CATEGORIES:
-            prefix_token = category + ' '
-            if rest.startswith(prefix_token):
-                matched = True
-                rest = rest[len(prefix_token):]
-                if not rest.startswith('{'):
-                    raise ValueError(f'Expected "{{" after plural category {category}')
-                depth = 0
-                for idx, ch in enumerate(rest):
-                    if ch == '{':
-                        depth += 1
-                    elif ch == '}':
-                        depth -= 1
-                        if depth == 0:
-                            text = rest[1:idx]
-                            cases[category] = text
-                            rest = rest[idx + 1:]
-                            break
-                else:
-                    raise ValueError('Unclosed plural case for ' + category)
+            if char == '{':
+                if chunk:
+                    nodes.append(''.join(chunk))
+                    chunk = []
+                nodes.append(self.argument(pound))
+                continue
+            if char == '#' and pound is not None:
+                if chunk:
+                    nodes.append(''.join(chunk))
+                    chunk = []
+                nodes.append(Argument(pound))
+            else:
+                chunk.append(char)
+            self.pos += 1
+        if chunk:
+            nodes.append(''.join(chunk))
+        return tuple(nodes)
+
+    def apostrophe(self, pound: str | None) -> str:
+        text = self.text
+        self.pos += 1
+        following = text[self.pos] if self.pos < len(text) else ''
+        if following == "'":
+            self.pos += 1
+            return "'"
+        if following not in ('{', '}') and not (following == '#' and pound is not None):
+            return "'"
+        quoted: List[str] = []
+        while self.pos < len(text):
+            char = text[self.pos]
+            self.pos += 1
+            if char != "'":
+                quoted.append(char)
+            elif self.pos < len(text) and text[self.pos] == "'":
+                quoted.append("'")
+                self.pos += 1
+            else:
+                return ''.join(quoted)
+        raise self.error('Unterminated quote')
+
+    def skip_spaces(self) -> None:
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def word(self) -> str:
+        start = self.pos
+        while self.pos < len(self.text) and not self.text[self.pos].isspace() and self.text[self.pos] not in '{},':
+            self.pos += 1
+        return self.text[start:self.pos]
+
+    def expect(self, char: str) -> None:
+        if self.pos >= len(self.text) or self.text[self.pos] != char:
+            raise self.error(f'Expected "{char}"')
+        self.pos += 1
+
+    def argument(self, pound: str | None) -> Node:
+        self.pos += 1
+        self.skip_spaces()
+        name = self.word()
+        if not name:
+            raise self.error('Expected an argument name')
+        self.skip_spaces()
+        if self.pos < len(self.text) and self.text[self.pos] == '}':
+            self.pos += 1
+            return Argument(name)
+        self.expect(',')
+        self.skip_spaces()
+        kind = self.word()
+        if kind not in CHOICE_KINDS:
+            raise self.error(f'Unsupported argument type "{kind}"')
+        self.skip_spaces()
+        self.expect(',')
+        cases: Dict[str, Message] = {}
+        while True:
+            self.skip_spaces()
+            if self.pos >= len(self.text):
+                raise self.error(f'Unclosed {kind} of "{name}"')
+            if self.text[self.pos] == '}':
+                self.pos += 1
                 break
-        if not matched:
-            raise ValueError('Could not parse plural cases from: ' + rest)
-    return prefix, cases, suffix
+            selector = self.word()
+            if kind == 'plural':
+                selector = EXACT_PLURALS.get(selector, selector)
+                if selector not in PLURAL_CATEGORIES:
+                    raise self.error(f'Unknown plural category "{selector}"')
+            elif not selector:
+                raise self.error('Expected a select case')
+            if selector in cases:
+                raise self.error(f'Duplicate case "{selector}"')
+            self.skip_spaces()
+            self.expect('{')
+            cases[selector] = self.message(name if kind == 'plural' else pound)
+            self.expect('}')
+        if 'other' not in cases:
+            raise self.error(f'{kind} of "{name}" has no "other" case')
+        return Choice(name, kind, tuple(cases.items()))
+
+
+@lru_cache(maxsize=None)
+def parse_message(text: str) -> Message:
+    # Cached by text, so a template entry parsed once for the signatures is
+    # reused for every locale, as is any translation shared by locales.
+    if PLAIN_TEXT.fullmatch(text):
+        return (text,)
+    return MessageParser(text).parse()
+
+
+def argument_names(message: Message) -> List[str]:
+    # Argument names in order of first appearance, nested cases included.
+    names: List[str] = []
+    pending = list(reversed(message))
+    while pending:
+        node = pending.pop()
+        if isinstance(node, str):
+            continue
+        if node.name not in names:
+            names.append(node.name)
+        if isinstance(node, Choice):
+            for _, case in reversed(node.cases):
+                pending.extend(reversed(case))
+    return names
 
 
+def ordered_placeholder_names(message: Message, placeholders: Dict[str, object]) -> List[str]:
+    # Declared placeholders in the order the template uses them; unused ones
+    # go last, by name.
+    used = [name for name in argument_names(message) if name in placeholders]
+    return used + sorted(name for name in placeholders if name not in used)
+
+
+@lru_cache(maxsize=None)
 def escape_dart_string(value: str) -> str:
     return json.dumps(value, ensure_ascii=False)
 
@@ -110,83 +321,110 @@ def locale_name(locale: str) -> str:
     return ''.join(part.capitalize() for part in parts)
 
 
-def build_signature(entry: Dict[str, object]) -> List[str]:
-    key = entry['key']
+def parameter_list(entry: Dict[str, object]) -> str:
     placeholders: Dict[str, object] = entry['placeholders']
-    placeholder_order: List[str] = entry['placeholder_order']
-    if not placeholders:
-        return [f'String get {key};']
-    if entry['is_plural']:
-        name = entry['plural_placeholder']
-        type_name = TYPE_MAP[placeholders[name]['type']]
-        return [f'String {key}({type_name} {name});']
     params = []
-    for name in placeholder_order:
+    for name in entry['placeholder_order']:
         placeholder = placeholders[name]
-        type_name = TYPE_MAP[placeholder['type']]
-        params.append(f'{type_name} {name}')
-    param_str = ', '.join(params)
-    return [f'String {key}({param_str});']
+        type_name = placeholder.get('type') if isinstance(placeholder, dict) else None
+        if type_name not in TYPE_MAP:
+            raise ValueError(f'Placeholder "{name}" has unsupported type {type_name!r}')
+        params.append(f'{TYPE_MAP[type_name]} {name}')
+    return ', '.join(params)
 
 
-def build_placeholder_method(entry: Dict[str, object], translation: str) -> List[str]:
-    placeholders: Dict[str, object] = entry['placeholders']
-    placeholder_order: List[str] = entry['placeholder_order']
-    params = []
-    for name in placeholder_order:
-        placeholder = placeholders[name]
-        type_name = TYPE_MAP[placeholder['type']]
-        params.append(f'{type_name} {name}')
-    param_str = ', '.join(params)
-    body = translation
-    for name in placeholder_order:
-        body = body.replace('{' + name + '}', '${' + name + '}')
-    body_literal = escape_dart_string(body)
-    method_name = entry['key']
-    return [
-        f'String {method_name}({param_str}) {{',
-        f'  return {body_literal};',
-        '}',
-    ]
-
-
-def build_plural_method(entry: Dict[str, object], translation: str) -> List[str]:
-    placeholders: Dict[str, object] = entry['placeholders']
-    name = entry['plural_placeholder']
-    placeholder = placeholders[name]
-    type_name = TYPE_MAP[placeholder['type']]
-    prefix, cases, suffix = parse_plural(translation, name)
-    case_lines = []
-    for category in PLURAL_CATEGORIES:
-        if category not in cases:
-            continue
-        text = cases[category].replace('#', '${' + name + '}')
-        case_lines.append(f'    {category}: {escape_dart_string(text)},')
-    lines = [
-        f'String {entry["key"]}({type_name} {name}) {{',
-        '  final value = intl.Intl.pluralLogic(',
-        f'    {name},',
-        '    locale: localeName,',
-    ]
-    lines.extend(case_lines)
-    lines.append('  );')
+def build_signature(entry: Dict[str, object]) -> List[str]:
+    key = entry['key']
+    if not entry['placeholders']:
+        return [f'String get {key};']
+    return [f'String {key}({parameter_list(entry)});']
+
+
+def dart_literal(nodes: Sequence[Node]) -> str:
+    # A run of text and arguments as one interpolated string literal.
     parts = []
-    if prefix:
-        parts.append(escape_dart_string(prefix))
-    parts.append('value')
-    if suffix:
-        parts.append(escape_dart_string(suffix))
-    if len(parts) == 1:
-        return_line = f'  return {parts[0]};'
+    for node in nodes:
+        if isinstance(node, str):
+            parts.append(escape_dart_string(node)[1:-1].replace('$', '\\$'))
+        else:
+            parts.append('${' + node.name + '}')
+    return '"' + ''.join(parts) + '"'
+
+
+def message_parts(message: Message, choice: Callable[[Choice], str]) -> List[str]:
+    # Runs of text and arguments become literals; every choice becomes
+    # whatever `choice` returns for it.
+    parts: List[str] = []
+    run: List[Node] = []
+    for node in message:
+        if isinstance(node, Choice):
+            if run:
+                parts.append(dart_literal(run))
+                run = []
+            parts.append(choice(node))
+        else:
+            run.append(node)
+    if run or not parts:
+        parts.append(dart_literal(run))
+    return parts
+
+
+def choice_call(node: Choice, entry: Dict[str, object], indent: str) -> str:
+    inner = indent + '  '
+
+    def case(message: Message, depth: str) -> str:
+        return ' + '.join(message_parts(message, lambda nested: choice_call(nested, entry, depth)))
+
+    cases = dict(node.cases)
+    if node.kind == 'plural':
+        if entry['placeholders'][node.name].get('type') not in ('int', 'num'):
+            raise ValueError(f'Plural placeholder "{node.name}" must be int or num')
+        lines = ['intl.Intl.pluralLogic(', f'{inner}{node.name},', f'{inner}locale: localeName,']
+        for category in PLURAL_CATEGORIES:
+            if category in cases:
+                lines.append(f'{inner}{category}: {case(cases[category], inner)},')
     else:
-        return_line = '  return ' + ' + '.join(parts) + ';'
-    lines.append(return_line)
+        lines = ['intl.Intl.selectLogic(', f'{inner}{node.name},', f'{inner}{{']
+        for selector, message in node.cases:
+            lines.append(f'{inner}  {escape_dart_string(selector)}: {case(message, inner + "  ")},')
+        lines.append(f'{inner}}},')
+    lines.append(f'{indent})')
+    return '\n'.join(lines)
+
+
+def build_method(entry: Dict[str, object], message: Message) -> List[str]:
+    # Top-level choices are computed into locals first (value, value2, ...),
+    # nested ones inline in the case that holds them.
+    lines = [f'String {entry["key"]}({parameter_list(entry)}) {{']
+
+    def hoist(node: Choice) -> str:
+        name = 'value' if len(lines) == 1 else f'value{len(lines)}'
+        lines.append(f'  final {name} = {choice_call(node, entry, "  ")};')
+        return name
+
+    parts = message_parts(message, hoist)
+    lines = [line for block in lines for line in block.split('\n')]
+    lines.append(f'  return {" + ".join(parts)};')
     lines.append('}')
     return lines
 
 
+def build_member(entry: Dict[str, object], translation: str) -> List[str]:
+    key = entry['key']
+    message = parse_message(translation)
+    unknown = [name for name in argument_names(message) if name not in entry['placeholders']]
+    if unknown:
+        raise ValueError(f'Undeclared placeholder(s) {", ".join(unknown)}')
+    if not entry['placeholders']:
+        return ['  @override', f'  String get {key} => {dart_literal(message)};']
+    return ['  @override'] + ['  ' + line for line in build_method(entry, message)]
+
+
 def generate_locale_class(
-    locale: str, entries: List[Dict[str, object]], translations: OrderedDict[str, str]
+    locale: str,
+    entries: List[Dict[str, object]],
+    translations: OrderedDict[str, str],
+    member: Callable[[Dict[str, object], str], List[str]] = build_member,
 ) -> List[str]:
     class_name = f'AppLocalizations{locale_name(locale)}'
     lines: List[str] = []
@@ -194,20 +432,7 @@ def generate_locale_class(
     lines.append(f'  {class_name}() : super({escape_dart_string(locale)});')
     lines.append('')
     for entry in entries:
-        key = entry['key']
-        translation = translations[key]
-        placeholders: Dict[str, object] = entry['placeholders']
-        lines.append('  @override')
-        if not placeholders:
-            value = escape_dart_string(translation)
-            lines.append(f'  String get {key} => {value};')
-            lines.append('')
-            continue
-        if entry['is_plural']:
-            method_lines = build_plural_method(entry, translation)
-        else:
-            method_lines = build_placeholder_method(entry, translation)
-        lines.extend(['  ' + line for line in method_lines])
+        lines.extend(member(entry, translations[entry['key']]))
         lines.append('')
     if lines[-1] == '':
         lines.pop()
@@ -215,52 +440,146 @@ def generate_locale_class(
     return lines
 
 
-def generate() -> None:
+def locale_file(locale: str) -> Path:
+    return OUTPUT_FILE.with_name(f"app_localizations_{locale.replace('-', '_').lower()}.dart")
+
+
+def stale_locale_files(keep: List[Path]) -> List[Path]:
+    # Part files or deferred libraries left behind by an earlier run for
+    # locales that are gone, or for a mode the output is no longer in.
+    markers = {f"part of '{OUTPUT_FILE.name}';", f"import '{OUTPUT_FILE.name}';"}
+    stale = []
+    for path in sorted(OUTPUT_FILE.parent.glob('app_localizations_*.dart')):
+        if path not in keep and markers & set(path.read_text(encoding='utf-8').splitlines()[:5]):
+            stale.append(path)
+    return stale
+
+
+def instantiate(locale: str, deferred: bool) -> str:
+    class_name = f'AppLocalizations{locale_name(locale)}'
+    if not deferred:
+        return f'{class_name}()'
+    library = locale_file(locale).stem
+    return f'{library}.loadLibrary().then((dynamic _) => {library}.{class_name}())'
+
+
+def generate(split: bool = False, deferred: bool = False, cache_path: Path | None = CACHE_FILE) -> Tuple[int, int]:
+    # Returns how many locale classes were rebuilt and how many output files
+    # were written; unchanged outputs are left untouched. split moves every
+    # locale class into a part file; deferred moves it into its own library
+    # that the delegate loads on demand with a `deferred as` import. Every
+    # problem in the ARB files is collected and raised as one ValueError
+    # before anything is written.
+    if split and deferred:
+        raise ValueError('split and deferred output are mutually exclusive')
+    generator = generator_digest()
+    cache = load_cache(cache_path, generator)
+    old_locales: Dict[str, Dict[str, object]] = cache['locales']
+    old_members: Dict[str, List[str]] = cache['entries']
+    members: Dict[str, List[str]] = {}
+    used: List[str] = []
+    problems: List[str] = []
     template_path = ARB_DIR / 'app_en.arb'
-    template_data = load_arb(template_path)
+    source = template_path
+
+    def cached_member(entry: Dict[str, object], translation: str) -> List[str]:
+        digest = entry_hash(entry, translation)
+        lines = members.get(digest) or old_members.get(digest)
+        if lines is None:
+            try:
+                lines = build_member(entry, translation)
+            except ValueError as error:
+                problems.append(f'{source}: {entry["key"]}: {error}')
+                return []
+        members[digest] = lines
+        used.append(digest)
+        return lines
+
+    # Reading, hashing and decoding run on a thread pool; only the template
+    # and ARB files that miss the cache are decoded.
+    arb_paths = sorted(set(ARB_DIR.glob('app_*.arb')) | {template_path})
+    with ThreadPoolExecutor() as executor:
+        loaded = dict(zip(arb_paths, executor.map(read_arb, arb_paths)))
+        template_digest = loaded[template_path][1]
+        stale = {
+            path
+            for path in arb_paths
+            if cache['template'] != template_digest or old_locales.get(path.name, {}).get('hash') != loaded[path][1]
+        }
+        wanted = [path for path in arb_paths if path in stale or path == template_path]
+        decoded = dict(zip(wanted, executor.map(decode_arb, [loaded[path][0] for path in wanted])))
+    for path, data in decoded.items():
+        if isinstance(data, str):
+            problems.append(f'{path}: {data}')
+    template_data = decoded[template_path]
+    if isinstance(template_data, str):
+        raise ValueError('\n'.join(problems))
 
     entries = []
     for key, value in template_data.items():
-        if key.startswith('@') or key == '@@locale':
+        if key.startswith('@'):
             continue
         metadata = template_data.get(f'@{key}', {})
-        placeholders = metadata.get('placeholders', {})
-        placeholders = OrderedDict(placeholders)
-        placeholder_order = ordered_placeholder_names(value, placeholders)
-        is_plural = False
-        plural_placeholder = None
-        for name in placeholder_order:
-            marker = '{' + name + ', plural,'
-            if marker in value:
-                is_plural = True
-                plural_placeholder = name
-                break
-        entries.append(
-            {
+        placeholders = OrderedDict(metadata.get('placeholders', {}))
+        try:
+            if not isinstance(value, str):
+                raise ValueError('Message is not a string')
+            entry = {
                 'key': key,
                 'value': value,
                 'placeholders': placeholders,
-                'placeholder_order': placeholder_order,
-                'is_plural': is_plural,
-                'plural_placeholder': plural_placeholder,
+                'placeholder_order': ordered_placeholder_names(parse_message(value), placeholders),
             }
-        )
+            parameter_list(entry)
+            entry['fingerprint'] = entry_fingerprint(entry)
+        except ValueError as error:
+            problems.append(f'{template_path}: {key}: {error}')
+            continue
+        entries.append(entry)
 
     locales: List[str] = []
-    locale_translations: Dict[str, OrderedDict[str, str]] = {}
-    for arb_path in sorted(ARB_DIR.glob('app_*.arb')):
-        data = load_arb(arb_path)
-        locale = data.get('@@locale')
-        if not isinstance(locale, str):
-            raise ValueError(f'Locale missing in {arb_path}')
+    locale_classes: Dict[str, List[str]] = {}
+    new_locales: Dict[str, Dict[str, object]] = {}
+    rebuilt = 0
+    for arb_path in arb_paths:
+        source = arb_path
+        arb_digest = loaded[arb_path][1]
+        if arb_path not in stale:
+            cached = old_locales[arb_path.name]
+            locale = cached['locale']
+            class_lines = cached['lines']
+            digests = cached['entries']
+            for digest in digests:
+                if digest in old_members:
+                    members[digest] = old_members[digest]
+        else:
+            data = decoded[arb_path]
+            if isinstance(data, str):
+                continue
+            locale = data.get('@@locale')
+            if not isinstance(locale, str):
+                problems.append(f'{arb_path}: Locale missing')
+                continue
+            # Keys that are missing or not strings are reported, and the
+            # members for the rest are still built so that their problems
+            # show up in the same run.
+            missing = [entry['key'] for entry in entries if entry['key'] not in data]
+            if missing:
+                problems.append(f'{arb_path}: Missing key(s) {", ".join(missing)}')
+            for entry in entries:
+                if entry['key'] in data and not isinstance(data[entry['key']], str):
+                    problems.append(f'{arb_path}: {entry["key"]}: Message is not a string')
+            present = [entry for entry in entries if isinstance(data.get(entry['key']), str)]
+            translations = OrderedDict((entry['key'], data[entry['key']]) for entry in present)
+            used.clear()
+            class_lines = generate_locale_class(locale, present, translations, cached_member)
+            digests = list(used)
+            rebuilt += 1
         locales.append(locale)
-        translations = OrderedDict()
-        for entry in entries:
-            key = entry['key']
-            if key not in data:
-                raise KeyError(f'Missing key {key} in {arb_path}')
-            translations[key] = data[key]
-        locale_translations[locale] = translations
+        locale_classes[locale] = class_lines
+        new_locales[arb_path.name] = {'hash': arb_digest, 'locale': locale, 'lines': class_lines, 'entries': digests}
+    if problems:
+        raise ValueError('\n'.join(problems))
 
     lines: List[str] = []
     lines.append('// GENERATED CODE - DO NOT MODIFY BY HAND.')
@@ -269,6 +588,15 @@ def generate() -> None:
     lines.append("import 'package:flutter/widgets.dart';")
     lines.append("import 'package:intl/intl.dart' as intl;")
     lines.append('')
+    if split:
+        for locale in locales:
+            lines.append(f"part '{locale_file(locale).name}';")
+        lines.append('')
+    if deferred:
+        for locale in locales:
+            library = locale_file(locale)
+            lines.append(f"import '{library.name}' deferred as {library.stem};")
+        lines.append('')
     lines.append('abstract class AppLocalizations {')
     lines.append('  AppLocalizations(String locale)')
     lines.append('      : localeName = intl.Intl.canonicalizedLocale(locale);')
@@ -314,14 +642,20 @@ def generate() -> None:
     lines.append('')
     lines.append('  @override')
     lines.append('  Future<AppLocalizations> load(Locale locale) {')
-    lines.append('    return SynchronousFuture<AppLocalizations>(lookupAppLocalizations(locale));')
+    if deferred:
+        lines.append('    return lookupAppLocalizations(locale);')
+    else:
+        lines.append('    return SynchronousFuture<AppLocalizations>(lookupAppLocalizations(locale));')
     lines.append('  }')
     lines.append('')
     lines.append('  @override')
     lines.append('  bool shouldReload(_AppLocalizationsDelegate old) => false;')
     lines.append('}')
     lines.append('')
-    lines.append('AppLocalizations lookupAppLocalizations(Locale locale) {')
+    if deferred:
+        lines.append('Future<AppLocalizations> lookupAppLocalizations(Locale locale) {')
+    else:
+        lines.append('AppLocalizations lookupAppLocalizations(Locale locale) {')
     lines.append('  if (!AppLocalizations._isSupported(locale)) {')
     lines.append('    throw FlutterError(')
     lines.append("        'AppLocalizations.delegate failed to load unsupported locale "
@@ -330,30 +664,82 @@ def generate() -> None:
     lines.append('  switch (locale.toString()) {')
     for locale in locales:
         lines.append(f'    case {escape_dart_string(locale)}:')
-        lines.append(f'      return AppLocalizations{locale_name(locale)}();')
+        lines.append(f'      return {instantiate(locale, deferred)};')
     lines.append('  }')
     lines.append('  switch (locale.languageCode) {')
     for locale in locales:
         lang = locale.split('_')[0]
         lines.append(f'    case {escape_dart_string(lang)}:')
-        lines.append(f'      return AppLocalizations{locale_name(locale)}();')
+        lines.append(f'      return {instantiate(locale, deferred)};')
     lines.append('  }')
     lines.append('  throw FlutterError(')
     lines.append("      'AppLocalizations.delegate failed to load unsupported locale '" +
                  ' + locale.toString() + ".");')
     lines.append('}')
-    lines.append('')
+
+    outputs: Dict[Path, List[str]] = {OUTPUT_FILE: lines}
     for locale in locales:
-        class_lines = generate_locale_class(locale, entries, locale_translations[locale])
-        lines.extend(class_lines)
-        lines.append('')
-    if lines[-1] == '':
-        lines.pop()
+        if split:
+            outputs[locale_file(locale)] = [
+                '// GENERATED CODE - DO NOT MODIFY BY HAND.',
+                '// ignore_for_file: type=lint, unused_import',
+                f"part of '{OUTPUT_FILE.name}';",
+                '',
+            ] + locale_classes[locale]
+        elif deferred:
+            outputs[locale_file(locale)] = [
+                '// GENERATED CODE - DO NOT MODIFY BY HAND.',
+                '// ignore_for_file: type=lint, unused_import',
+                "import 'package:intl/intl.dart' as intl;",
+                f"import '{OUTPUT_FILE.name}';",
+                '',
+            ] + locale_classes[locale]
+        else:
+            lines.append('')
+            lines.extend(locale_classes[locale])
+
+    written = 0
+    for path, file_lines in outputs.items():
+        written += write_if_changed(path, '\n'.join(file_lines) + '\n')
+    for path in stale_locale_files(list(outputs)):
+        path.unlink()
+    if cache_path is not None:
+        save_cache(
+            cache_path,
+            {
+                'version': CACHE_VERSION,
+                'generator': generator,
+                'template': template_digest,
+                'locales': new_locales,
+                'entries': members,
+            },
+        )
+    return rebuilt, written
 
-    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_FILE.open('w', encoding='utf-8') as f:
-        f.write('\n'.join(lines) + '\n')
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=f'Generate {OUTPUT_FILE} from the ARB files in {ARB_DIR}')
+    layout = parser.add_mutually_exclusive_group()
+    layout.add_argument(
+        '--split',
+        action='store_true',
+        help='put every locale class in its own part file next to the main library',
+    )
+    layout.add_argument(
+        '--deferred',
+        action='store_true',
+        help='put every locale class in its own library, loaded with a deferred import when first needed',
+    )
+    parser.add_argument('--no-cache', action='store_true', help=f'ignore and do not update {CACHE_FILE}')
+    return parser.parse_args()
 
 
 if __name__ == '__main__':
-    generate()
+    args = parse_args()
+    try:
+        rebuilt, written = generate(
+            split=args.split, deferred=args.deferred, cache_path=None if args.no_cache else CACHE_FILE
+        )
+    except ValueError as error:
+        sys.exit(f'error: {error}')
+    print(f'Rebuilt {rebuilt} locale class(es), wrote {written} file(s)')
@@ -1,135 +1,324 @@
 #!/usr/bin/env python3
-import math
+import argparse
+import os
 import random
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
 
-BASE = 3
-SIDE = BASE * BASE
-BOARD_CELLS = SIDE * SIDE
+from bitmask_solver import BOARD_CELLS, CLASSIC, SHAPES, UNKNOWN, SearchStats, Shape
+from canonical import canonical_form
+from grader import MAX_SCORE, rate
+from grid_pool import DEFAULT_POOL, DEFAULT_POOL_SIZE, open_pool, pool_chunks, random_grid
+from local_search import ULTRA_GIVENS, ULTRA_SECONDS, anneal_puzzle
+from puzzle_asset import DEFAULT_ASSET, build_loader, encode_asset
+from puzzle_store import DEFAULT_STORE, PuzzleStore
+from scheduler import QuotaScheduler, TierCost
+from solvers import DEFAULT_SOLVER, SOLVERS, get_solver
+from telemetry import Telemetry
 
 
-def pattern(row: int, col: int) -> int:
-    return (BASE * (row % BASE) + row // BASE + col) % SIDE
+OUTPUT_FILE = Path("lib/puzzles.dart")
+LOADER_FILE = Path("lib/puzzle_pack.dart")
+ULTRA_FILE = Path("lib/puzzles_ultra.dart")
+OUTPUT_FORMATS = ("dart", "binary")
 
 
-def shuffled(seq: Iterable[int]) -> List[int]:
+def pattern(row: int, col: int, shape: Shape = CLASSIC) -> int:
+    return (shape.box_cols * (row % shape.box_rows) + row // shape.box_rows + col) % shape.side
+
+
+def task_rng(seed: int, *parts: object) -> random.Random:
+    return random.Random(":".join(str(part) for part in (seed, *parts)))
+
+
+def shuffled(seq: Iterable[int], rng: random.Random | None = None) -> List[int]:
     seq = list(seq)
-    return random.sample(seq, len(seq))
+    return (rng or random).sample(seq, len(seq))
 
 
-def generate_solution() -> List[int]:
-    rows = [g * BASE + r for g in shuffled(range(BASE)) for r in shuffled(range(BASE))]
-    cols = [g * BASE + c for g in shuffled(range(BASE)) for c in shuffled(range(BASE))]
-    nums = shuffled(range(1, SIDE + 1))
-    return [nums[pattern(r, c)] for r in rows for c in cols]
+def generate_solution(rng: random.Random | None = None, shape: Shape = CLASSIC) -> List[int]:
+    # Bands are box_rows rows tall and stacks box_cols columns wide.
+    rows = [
+        g * shape.box_rows + r
+        for g in shuffled(range(shape.box_cols), rng)
+        for r in shuffled(range(shape.box_rows), rng)
+    ]
+    cols = [
+        g * shape.box_cols + c
+        for g in shuffled(range(shape.box_rows), rng)
+        for c in shuffled(range(shape.box_cols), rng)
+    ]
+    nums = shuffled(range(1, shape.side + 1), rng)
+    return [nums[pattern(r, c, shape)] for r in rows for c in cols]
 
 
-def count_solutions(board: List[int], limit: int = 2) -> int:
-    rows = [set() for _ in range(SIDE)]
-    cols = [set() for _ in range(SIDE)]
-    boxes = [set() for _ in range(SIDE)]
+GRID_SOURCES = ("pool", "pattern")
 
-    for index, value in enumerate(board):
-        if value == 0:
-            continue
-        row = index // SIDE
-        col = index % SIDE
-        box = (row // BASE) * BASE + col // BASE
-        rows[row].add(value)
-        cols[col].add(value)
-        boxes[box].add(value)
 
-    count = 0
+def draw_solution(
+    rng: random.Random | None = None, pool: Path | None = None, shape: Shape = CLASSIC
+) -> List[int]:
+    # Pattern grids are all relabellings of one base grid; the pool holds
+    # grids from a randomised solver and hands them out transformed. The pool
+    # file only stores classic grids, so other sizes run the randomised
+    # solver per draw (about 10 ms for a 16x16 grid).
+    if pool is None:
+        return generate_solution(rng, shape)
+    if shape != CLASSIC:
+        return random_grid(rng or random, shape)
+    return open_pool(pool).draw(rng or random)
 
-    def search() -> None:
-        nonlocal count
-        if count >= limit:
-            return
 
-        best_candidates: List[int] | None = None
-        best_index = -1
+def dedupe_key(puzzle: Sequence[int]) -> bytes:
+    # The canonical form covers the classic symmetry group only; other sizes
+    # dedupe on the board itself.
+    return canonical_form(puzzle) if len(puzzle) == BOARD_CELLS else bytes(puzzle)
 
-        for index, value in enumerate(board):
-            if value != 0:
-                continue
-            row = index // SIDE
-            col = index % SIDE
-            box = (row // BASE) * BASE + col // BASE
-            used = rows[row] | cols[col] | boxes[box]
-            candidates = [n for n in range(1, SIDE + 1) if n not in used]
-            if not candidates:
-                return
-            if best_candidates is None or len(candidates) < len(best_candidates):
-                best_candidates = candidates
-                best_index = index
-                if len(best_candidates) == 1:
-                    break
 
-        if best_candidates is None:
-            count += 1
-            return
-
-        row = best_index // SIDE
-        col = best_index % SIDE
-        box = (row // BASE) * BASE + col // BASE
-
-        for value in best_candidates:
-            board[best_index] = value
-            rows[row].add(value)
-            cols[col].add(value)
-            boxes[box].add(value)
-            search()
-            board[best_index] = 0
-            rows[row].remove(value)
-            cols[col].remove(value)
-            boxes[box].remove(value)
-            if count >= limit:
-                return
-
-    search()
-    return count
+CARVE_STRATEGIES = ("batched", "greedy")
 
+Counter = Callable[..., int]
 
-def make_puzzle(solution: List[int], givens_range: Tuple[int, int], *, attempts: int = 12) -> List[int] | None:
-    for _ in range(attempts):
-        target_givens = random.randint(givens_range[0], givens_range[1])
-        empties_target = BOARD_CELLS - target_givens
-        board = solution[:]
-        positions = list(range(BOARD_CELLS))
-        random.shuffle(positions)
-        removed = 0
-
-        for pos in positions:
-            if removed >= empties_target:
+
+@dataclass
+class CarveStats(SearchStats):
+    solver_calls: int = 0
+    witness_hits: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+
+
+WITNESS_CACHE_SIZE = 128
+
+# Uniqueness checks on the generated packs stay under 1 node per cell on
+# 9x9 and under 6 on the slowest 16x16 boards, so only a pathological board
+# runs into this and a default run rejects nothing extra.
+NODE_BUDGET_PER_CELL = 50
+
+
+# Second solutions found while checking removals, kept per source solution
+# as the mask (bit per cell) of cells where they differ from it. A board
+# whose givens all lie outside one of these masks is solved by that grid as
+# well, so it is not unique and needs no search. Least recently matched
+# masks drop out first.
+class WitnessCache:
+    def __init__(self, capacity: int = WITNESS_CACHE_SIZE) -> None:
+        self.capacity = capacity
+        self.masks: OrderedDict[int, None] = OrderedDict()
+
+    def refutes(self, givens: int) -> bool:
+        for mask in reversed(self.masks):
+            if givens & mask == 0:
+                self.masks.move_to_end(mask)
+                return True
+        return False
+
+    def add(self, mask: int) -> None:
+        self.masks[mask] = None
+        self.masks.move_to_end(mask)
+        if len(self.masks) > self.capacity:
+            self.masks.popitem(last=False)
+
+
+def carve_greedy(
+    solution: List[int],
+    positions: List[int],
+    empties_target: int,
+    count: Counter,
+    stats: CarveStats,
+    essentials: Dict[int, List[int]],
+    start: List[int] | None = None,
+) -> List[int] | None:
+    board = (start or solution)[:]
+    removed = 0
+
+    for pos in positions:
+        if removed >= empties_target:
+            break
+        if board[pos] == 0:
+            continue
+        saved = board[pos]
+        board[pos] = 0
+        if count(board, limit=2) == 1:
+            removed += 1
+        else:
+            board[pos] = saved
+
+    if removed >= empties_target:
+        return board
+    return None
+
+
+def carve_batched(
+    solution: List[int],
+    positions: List[int],
+    empties_target: int,
+    count: Counter,
+    stats: CarveStats,
+    essentials: Dict[int, List[int]],
+    start: List[int] | None = None,
+) -> List[int] | None:
+    # Produces exactly the board carve_greedy would for the same order, with
+    # fewer solver calls. Uniqueness is monotone in the set of givens: if a
+    # batch of removals keeps the board unique, every prefix of it does too,
+    # and a cell that was essential for some set of givens stays essential
+    # for every subset of it. `essentials` maps a cell to the givens masks
+    # (bit per cell) under which it was found essential.
+    board = (start or solution)[:]
+    givens = sum(1 << pos for pos in range(len(board)) if board[pos])
+    removed = 0
+    index = 0
+    batch = 4
+
+    def unique(cells: List[int]) -> bool:
+        for pos in cells:
+            board[pos] = 0
+        result = count(board, limit=2) == 1
+        for pos in cells:
+            board[pos] = solution[pos]
+        return result
+
+    while removed < empties_target:
+        if removed + len(positions) - index < empties_target:
+            return None
+        size = min(batch, empties_target - removed, len(positions) - index)
+        chunk: List[int] = []
+        for pos in positions[index : index + size]:
+            if any(givens & ~mask == 0 for mask in essentials.get(pos, ())):
                 break
-            if board[pos] == 0:
-                continue
-            saved = board[pos]
+            chunk.append(pos)
+        if not chunk:
+            index += 1
+            continue
+
+        if unique(chunk):
+            keep = len(chunk)
+            batch *= 2
+        else:
+            low, high = 0, len(chunk) - 1
+            while low < high:
+                mid = (low + high + 1) // 2
+                if unique(chunk[:mid]):
+                    low = mid
+                else:
+                    high = mid - 1
+            keep = low
+            batch = max(1, batch // 2)
+
+        for pos in chunk[:keep]:
             board[pos] = 0
-            if count_solutions(board, limit=2) == 1:
-                removed += 1
-            else:
-                board[pos] = saved
+            givens &= ~(1 << pos)
+        removed += keep
+        index += keep
+        if keep < len(chunk):
+            essentials.setdefault(chunk[keep], []).append(givens)
+            index += 1
 
-        if removed >= empties_target:
+    return board
+
+
+def witness_counter(
+    solution: List[int],
+    solver: str,
+    stats: CarveStats,
+    witnesses: WitnessCache | None = None,
+    budget: int | None = None,
+) -> Counter:
+    # A search that runs out of `budget` nodes counts as UNKNOWN, which the
+    # carvers treat like a second solution: the removal is turned down.
+    witnesses = witnesses if witnesses is not None else WitnessCache()
+    find = get_solver(solver).find_solutions
+
+    def count(board: List[int], limit: int = 2) -> int:
+        givens = sum(1 << pos for pos, value in enumerate(board) if value)
+        if witnesses.refutes(givens):
+            stats.witness_hits += 1
+            return limit
+        stats.solver_calls += 1
+        found = find(board, limit, stats, budget)
+        if found is None:
+            return UNKNOWN
+        for grid in found:
+            if grid != solution:
+                witnesses.add(sum(1 << pos for pos, value in enumerate(grid) if value != solution[pos]))
+        return len(found)
+
+    return count
+
+
+def make_puzzle(
+    solution: List[int],
+    givens_range: Tuple[int, int],
+    *,
+    attempts: int = 12,
+    solver: str = DEFAULT_SOLVER,
+    rng: random.Random | None = None,
+    strategy: str = "batched",
+    stats: CarveStats | None = None,
+    essentials: Dict[int, List[int]] | None = None,
+    start: List[int] | None = None,
+    witnesses: WitnessCache | None = None,
+    budget: int | None = None,
+) -> List[int] | None:
+    # `start` continues carving from a board that already has some of the
+    # solution removed; only its remaining givens are candidates. Pass the
+    # same `essentials` and `witnesses` to every call on one solution so
+    # later tiers reuse what earlier ones learned about it.
+    rng = rng or random
+    stats = stats if stats is not None else CarveStats()
+    count = witness_counter(solution, solver, stats, witnesses, budget)
+    carve = carve_batched if strategy == "batched" else carve_greedy
+    essentials = essentials if essentials is not None else {}
+    cells = list(range(len(solution))) if start is None else [pos for pos in range(len(start)) if start[pos]]
+    for _ in range(attempts):
+        target_givens = rng.randint(givens_range[0], givens_range[1])
+        empties_target = len(cells) - target_givens
+        positions = cells[:]
+        rng.shuffle(positions)
+        board = carve(solution, positions, empties_target, count, stats, essentials, start)
+        if board is not None:
             return board
+        stats.rejected += 1
     return None
 
 
-def chunked(values: Sequence[int]) -> Iterable[Sequence[int]]:
-    for start in range(0, len(values), SIDE):
-        yield values[start : start + SIDE]
+def make_ultra_puzzle(
+    solution: List[int],
+    givens_range: Tuple[int, int] = ULTRA_GIVENS,
+    *,
+    seconds: float = ULTRA_SECONDS,
+    solver: str = DEFAULT_SOLVER,
+    rng: random.Random | None = None,
+    stats: CarveStats | None = None,
+    budget: int | None = None,
+) -> List[int] | None:
+    # One local-search run (see local_search.py) instead of make_puzzle's
+    # repeated one-pass carves, which rarely get below 22 givens.
+    stats = stats if stats is not None else CarveStats()
+    count = witness_counter(solution, solver, stats, budget=budget)
+    board = anneal_puzzle(solution, givens_range, count, rng or random.Random(), seconds)
+    if board is None:
+        stats.rejected += 1
+    return board
+
+
+@lru_cache(maxsize=None)
+def board_template(shape: Shape = CLASSIC, indent: str = "        ") -> str:
+    # One line per row, a comma after every cell and a space after each box.
+    row = ", ".join(",".join(["{}"] * shape.box_cols) for _ in range(shape.box_rows)) + ","
+    return "".join(indent + row + "\n" for _ in range(shape.side))
 
 
-def format_board(board: Sequence[int], indent: str = "        ") -> List[str]:
-    lines: List[str] = []
-    for row in chunked(board):
-        lines.append(
-            f"{indent}{row[0]},{row[1]},{row[2]}, {row[3]},{row[4]},{row[5]}, {row[6]},{row[7]},{row[8]},"
-        )
-    return lines
+def format_board(board: Sequence[int], indent: str = "        ", shape: Shape = CLASSIC) -> str:
+    return board_template(shape, indent).format(*board)
 
 
 @dataclass
@@ -137,81 +326,791 @@ class DifficultyConfig:
     name: str
     dart_enum: str
     givens: Tuple[int, int]
+    rating: Tuple[int, int]
+    solver: str = DEFAULT_SOLVER
+    carve: str = "batched"
+    shape: Shape = CLASSIC
+    node_budget: int = NODE_BUDGET_PER_CELL
 
+    @property
+    def search_budget(self) -> int | None:
+        return self.node_budget * self.shape.cells if self.node_budget else None
 
-def build_output(data: Dict[str, List[Tuple[List[int], List[int]]]], configs: List[DifficultyConfig]) -> str:
-    lines: List[str] = [
-        "import 'models.dart';",
-        "",
-        "/// Класс одной головоломки судоку",
-        "class Puzzle {",
-        "  final List<int> board;    // стартовая доска (0 = пустая клетка)",
-        "  final List<int> solution; // правильное решение",
-        "",
-        "  const Puzzle(this.board, this.solution);",
-        "}",
-        "",
-        "/// Коллекция судоку по уровням сложности.",
-        "final Map<Difficulty, List<Puzzle>> puzzles = {",
-    ]
 
+OUTPUT_HEADER = """import 'models.dart';
+import 'puzzle.dart';
+
+export 'puzzle.dart';
+
+/// Коллекция судоку по уровням сложности.
+final Map<Difficulty, List<Puzzle>> puzzles = {
+"""
+
+VARIANT_HEADER = """import 'models.dart';
+import 'puzzle.dart';
+
+/// Коллекция судоку {label} по уровням сложности.
+final Map<Difficulty, List<Puzzle>> puzzles{label} = {{
+"""
+
+
+ULTRA_HEADER = """import 'puzzle.dart';
+
+/// Судоку с 17–21 подсказками, найденные локальным поиском. Уровня для них
+/// в Difficulty пока нет, поэтому они лежат отдельным списком.
+final List<Puzzle> ultraPuzzles = [
+"""
+
+
+def output_file(shape: Shape = CLASSIC) -> Path:
+    return OUTPUT_FILE if shape == CLASSIC else OUTPUT_FILE.with_name(f"puzzles_{shape.label}.dart")
+
+
+def puzzle_entry(puzzle_board: Sequence[int], solution: Sequence[int], shape: Shape = CLASSIC) -> str:
+    return (
+        "    Puzzle(\n      [\n"
+        + format_board(puzzle_board, shape=shape)
+        + "      ],\n      [\n"
+        + format_board(solution, shape=shape)
+        + "      ],\n    ),\n"
+    )
+
+
+def iter_output(
+    data: Dict[str, Iterable[Tuple[Sequence[int], Sequence[int]]]], configs: List[DifficultyConfig]
+) -> Iterator[str]:
+    shape = configs[0].shape if configs else CLASSIC
+    yield OUTPUT_HEADER if shape == CLASSIC else VARIANT_HEADER.format(label=shape.label)
     for config in configs:
-        lines.append(f"  {config.dart_enum}: [")
-        entries = data.get(config.name, [])
-        for puzzle_board, solution in entries:
-            lines.append("    Puzzle(")
-            lines.append("      [")
-            lines.extend(format_board(puzzle_board, indent="        "))
-            lines.append("      ],")
-            lines.append("      [")
-            lines.extend(format_board(solution, indent="        "))
-            lines.append("      ],")
-            lines.append("    ),")
-        lines.append("  ],")
-    lines.append("};")
-    lines.append("")
-    return "\n".join(lines)
-
-
-def main() -> None:
-    random.seed(20240917)
-    target_per_level = 100
-    configs = [
-        DifficultyConfig("novice", "Difficulty.novice", (40, 45)),
-        DifficultyConfig("medium", "Difficulty.medium", (34, 39)),
-        DifficultyConfig("high", "Difficulty.high", (28, 33)),
-        DifficultyConfig("expert", "Difficulty.expert", (24, 27)),
-        DifficultyConfig("master", "Difficulty.master", (22, 23)),
-    ]
+        yield f"  {config.dart_enum}: [\n"
+        for puzzle_board, solution in data.get(config.name, []):
+            yield puzzle_entry(puzzle_board, solution, shape)
+        yield "  ],\n"
+    yield "};\n"
+
+
+def build_output(data: Dict[str, List[Tuple[List[int], List[int]]]], configs: List[DifficultyConfig]) -> str:
+    return "".join(iter_output(data, configs))
+
 
+def atomic_write(path: Path, chunks: Iterable[str] | Iterable[bytes], binary: bool = False) -> None:
+    # Stream into a sibling temp file and rename it over the target, so an
+    # interrupted run never leaves a truncated file behind.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handle = tempfile.NamedTemporaryFile(
+        "wb" if binary else "w",
+        encoding=None if binary else "utf-8",
+        dir=path.parent,
+        prefix=path.name + ".",
+        suffix=".tmp",
+        delete=False,
+    )
+    try:
+        with handle:
+            handle.writelines(chunks)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.chmod(handle.name, path.stat().st_mode & 0o777 if path.exists() else 0o644)
+        os.replace(handle.name, path)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+
+
+def ensure_pool(path: Path, size: int = DEFAULT_POOL_SIZE) -> None:
+    # A missing pool is built, and so is one that does not open (such as a
+    # short file left by a build that was killed before builds were atomic).
+    try:
+        open_pool(path)
+        return
+    except FileNotFoundError:
+        print(f"Building grid pool {path} with {size} grids")
+    except (OSError, ValueError) as error:
+        print(f"Rebuilding grid pool {path} with {size} grids ({error})")
+    atomic_write(path, pool_chunks(size), binary=True)
+
+
+def write_output(
+    data: Dict[str, Iterable[Tuple[Sequence[int], Sequence[int]]]],
+    configs: List[DifficultyConfig],
+    path: Path | None = None,
+) -> None:
+    atomic_write(path or output_file(configs[0].shape), iter_output(data, configs))
+
+
+def write_ultra(puzzles: List[Tuple[List[int], List[int]]], path: Path = ULTRA_FILE) -> None:
+    chunks = [ULTRA_HEADER, *(puzzle_entry(board, solution) for board, solution in puzzles), "];\n"]
+    atomic_write(path, chunks)
+
+
+def write_asset(
+    data: Dict[str, List[Tuple[List[int], List[int]]]],
+    configs: List[DifficultyConfig],
+    asset: Path = Path(DEFAULT_ASSET),
+    loader: Path = LOADER_FILE,
+    include_solutions: bool = True,
+) -> None:
+    # The loader only depends on lib/puzzle.dart; lib/puzzles.dart is left
+    # as it is, since the app still reads its puzzles from there.
+    tiers = [(cfg.dart_enum.split(".")[-1], data.get(cfg.name, [])) for cfg in configs]
+    atomic_write(asset, encode_asset(tiers, include_solutions), binary=True)
+    atomic_write(loader, [build_loader(asset.as_posix())])
+
+
+BUCKET_MODES = ("rating", "givens")
+SCHEDULES = ("quota", "sweep")
+SCHEDULE_BATCH = 32
+
+
+def bucket_for(
+    puzzle: List[int], carved_for: DifficultyConfig, configs: List[DifficultyConfig], bucket: str
+) -> str | None:
+    # Boards the grader cannot finish are discarded rather than filed as
+    # master: their brute-force score says nothing about how hard they are.
+    if bucket == "givens":
+        return carved_for.name
+    rating = rate(puzzle)
+    if not rating.solved:
+        return None
+    for cfg in configs:
+        if cfg.rating[0] <= rating.score <= cfg.rating[1]:
+            return cfg.name
+    return None
+
+
+def generate_task(
+    seed: int,
+    index: int,
+    configs: List[DifficultyConfig],
+    bucket: str = "rating",
+    budgets: Dict[str, int] | None = None,
+    pool: Path | None = None,
+) -> Tuple[List[int], Dict[str, Tuple[List[int], str | None, bytes]], Dict[str, CarveStats]]:
+    # Without budgets every tier is carved from the full solution with up to
+    # five make_puzzle rounds. With budgets (tier -> rounds) only the listed
+    # tiers are carved, as one chain: the first round continues from the
+    # previous tier's board, later rounds start over from the solution (the
+    # board above a hard tier is often too close to minimal to go further).
+    solution = draw_solution(task_rng(seed, index), pool, configs[0].shape)
+    essentials: Dict[int, List[int]] = {}
+    witnesses = WitnessCache()
+    found: Dict[str, Tuple[List[int], str | None, bytes]] = {}
+    costs: Dict[str, CarveStats] = {}
+    start: List[int] | None = None
+    for cfg in configs:
+        if budgets is not None and cfg.name not in budgets:
+            continue
+        rng = task_rng(seed, index, cfg.name)
+        stats = costs[cfg.name] = CarveStats()
+        started = time.perf_counter()
+        for round_index in range(5 if budgets is None else budgets[cfg.name]):
+            puzzle = make_puzzle(
+                solution,
+                cfg.givens,
+                solver=cfg.solver,
+                rng=rng,
+                strategy=cfg.carve,
+                stats=stats,
+                essentials=essentials,
+                start=start if round_index == 0 else None,
+                witnesses=witnesses,
+                budget=cfg.search_budget,
+            )
+            if puzzle is not None:
+                if budgets is not None:
+                    start = puzzle
+                found[cfg.name] = (
+                    puzzle,
+                    bucket_for(puzzle, cfg, configs, bucket),
+                    dedupe_key(puzzle),
+                )
+                break
+        stats.seconds = time.perf_counter() - started
+    return solution, found, costs
+
+
+def report_progress(attempts: int, puzzles: Dict[str, List[Tuple[List[int], List[int]]]]) -> None:
+    if attempts % 25 == 0:
+        status = ", ".join(f"{name}: {len(entries)}" for name, entries in puzzles.items())
+        print(f"Progress after {attempts} seeds -> {status}")
+
+
+def report_solver_calls(configs: List[DifficultyConfig], solver_calls: Dict[str, List[int]]) -> None:
+    parts = []
+    for cfg in configs:
+        calls = solver_calls.get(cfg.name)
+        if calls:
+            parts.append(f"{cfg.name}: {sum(calls) / len(calls):.1f} (max {max(calls)})")
+    if parts:
+        print("Solver calls per puzzle -> " + ", ".join(parts))
+
+
+def generate_serial(
+    seed: int,
+    configs: List[DifficultyConfig],
+    target_per_level: int,
+    solver_calls: Dict[str, List[int]] | None = None,
+    bucket: str = "rating",
+    telemetry: Telemetry | None = None,
+    pool: Path | None = None,
+) -> Dict[str, List[Tuple[List[int], List[int]]]]:
+    random.seed(seed)
     puzzles: Dict[str, List[Tuple[List[int], List[int]]]] = {cfg.name: [] for cfg in configs}
-    seen: set[Tuple[int, ...]] = set()
+    seen: set[bytes] = set()
 
     attempts = 0
     while any(len(puzzles[cfg.name]) < target_per_level for cfg in configs):
         attempts += 1
-        solution = generate_solution()
+        solution = draw_solution(pool=pool, shape=configs[0].shape)
+        essentials: Dict[int, List[int]] = {}
+        witnesses = WitnessCache()
         for cfg in configs:
-            if len(puzzles[cfg.name]) >= target_per_level:
+            if bucket == "givens" and len(puzzles[cfg.name]) >= target_per_level:
                 continue
+            stats = CarveStats()
+            started = time.perf_counter()
             for _ in range(5):
-                puzzle = make_puzzle(solution, cfg.givens)
+                puzzle = make_puzzle(
+                    solution,
+                    cfg.givens,
+                    solver=cfg.solver,
+                    strategy=cfg.carve,
+                    stats=stats,
+                    essentials=essentials,
+                    witnesses=witnesses,
+                    budget=cfg.search_budget,
+                )
                 if puzzle is None:
                     continue
-                key = tuple(puzzle)
+                key = dedupe_key(puzzle)
                 if key in seen:
+                    if telemetry is not None:
+                        telemetry.record_duplicate(cfg.name)
+                    continue
+                name = bucket_for(puzzle, cfg, configs, bucket)
+                if name is None or len(puzzles[name]) >= target_per_level:
+                    if telemetry is not None:
+                        telemetry.record_discarded(cfg.name)
                     continue
                 seen.add(key)
-                puzzles[cfg.name].append((puzzle, solution[:]))
+                puzzles[name].append((puzzle, solution[:]))
+                if solver_calls is not None:
+                    solver_calls.setdefault(name, []).append(stats.solver_calls)
+                if telemetry is not None:
+                    telemetry.record_accepted(cfg.name)
                 break
-        if attempts % 25 == 0:
-            status = ", ".join(f"{cfg.name}: {len(puzzles[cfg.name])}" for cfg in configs)
-            print(f"Progress after {attempts} seeds -> {status}")
-
-    output = build_output(puzzles, configs)
-    Path("lib").mkdir(parents=True, exist_ok=True)
-    Path("lib/puzzles.dart").write_text(output)
-    print("Generated lib/puzzles.dart with", sum(len(v) for v in puzzles.values()), "puzzles")
+            if telemetry is not None:
+                telemetry.record_carve(
+                    cfg.name,
+                    stats.solver_calls,
+                    stats.search_nodes,
+                    stats.propagated,
+                    stats.witness_hits,
+                    stats.budget_trips,
+                    stats.rejected,
+                    time.perf_counter() - started,
+                )
+        report_progress(attempts, puzzles)
+        if telemetry is not None:
+            telemetry.record_seed(attempts, {name: len(entries) for name, entries in puzzles.items()})
+    return puzzles
+
+
+def generate_seeded(
+    seed: int,
+    configs: List[DifficultyConfig],
+    target_per_level: int,
+    workers: int | None,
+    store: PuzzleStore | None = None,
+    solver_calls: Dict[str, List[int]] | None = None,
+    bucket: str = "rating",
+    telemetry: Telemetry | None = None,
+    schedule: str = "sweep",
+    pool: Path | None = None,
+) -> Dict[str, List[Tuple[List[int], List[int]]]]:
+    # Every task draws from its own RNG streams derived from (seed, index)
+    # and (seed, index, tier), and results are consumed in index order, so
+    # the pack does not depend on scheduling or on the worker count. The
+    # quota scheduler only replans between batches of SCHEDULE_BATCH tasks
+    # and its counters are stored with each finished batch, which keeps that
+    # true, including across resumed runs.
+    puzzles: Dict[str, List[Tuple[List[int], List[int]]]] = {cfg.name: [] for cfg in configs}
+    seen: set[bytes] = set()
+    attempts = 0
+    scheduler = None
+    if schedule == "quota":
+        scheduler = QuotaScheduler([cfg.name for cfg in configs], target_per_level)
+    if store is not None:
+        for name, entries in store.load().items():
+            puzzles.setdefault(name, []).extend(entries)
+        seen = store.canonical_keys()
+        attempts = store.next_task(seed)
+        if scheduler is not None:
+            for name, (stops, calls, landed) in store.load_schedule(seed).items():
+                if name in scheduler.costs:
+                    scheduler.costs[name] = TierCost(stops, calls, landed)
+    batch_size = SCHEDULE_BATCH if scheduler is not None else (workers or 1) * 4
+
+    with ProcessPoolExecutor(max_workers=workers) if workers else nullcontext() as executor:
+        run = executor.map if executor is not None else map
+        while True:
+            pending = [cfg for cfg in configs if len(puzzles[cfg.name]) < target_per_level]
+            if not pending:
+                break
+            plans: List[Dict[str, int] | None] = [None] * batch_size
+            if scheduler is not None:
+                plans = list(scheduler.plan({name: len(entries) for name, entries in puzzles.items()}, batch_size))
+                task_configs = configs
+            else:
+                task_configs = pending if bucket == "givens" else configs
+            indices = range(attempts, attempts + batch_size)
+            results = run(
+                generate_task,
+                [seed] * batch_size,
+                indices,
+                [task_configs] * batch_size,
+                [bucket] * batch_size,
+                plans,
+                [pool] * batch_size,
+            )
+            batch_accepted: List[Tuple[str, List[int], List[int], bytes]] = []
+            for index, budgets, (solution, found, costs) in zip(indices, plans, results):
+                if all(len(puzzles[cfg.name]) >= target_per_level for cfg in configs):
+                    break
+                attempts += 1
+                hints = task_configs if budgets is None else [cfg for cfg in configs if cfg.name in budgets]
+                accepted: List[Tuple[str, List[int], List[int], bytes]] = []
+                for cfg in hints:
+                    stats = costs[cfg.name]
+                    if telemetry is not None:
+                        telemetry.record_carve(
+                            cfg.name,
+                            stats.solver_calls,
+                            stats.search_nodes,
+                            stats.propagated,
+                            stats.witness_hits,
+                            stats.budget_trips,
+                            stats.rejected,
+                            stats.seconds,
+                        )
+                    if cfg.name not in found:
+                        continue
+                    puzzle, name, key = found[cfg.name]
+                    if name is None or len(puzzles[name]) >= target_per_level:
+                        if telemetry is not None:
+                            telemetry.record_discarded(cfg.name)
+                        continue
+                    if key in seen:
+                        if telemetry is not None:
+                            telemetry.record_duplicate(cfg.name)
+                        continue
+                    seen.add(key)
+                    puzzles[name].append((puzzle, solution[:]))
+                    accepted.append((name, puzzle, solution, key))
+                    if solver_calls is not None:
+                        solver_calls.setdefault(name, []).append(stats.solver_calls)
+                    if telemetry is not None:
+                        telemetry.record_accepted(cfg.name)
+                if scheduler is not None:
+                    for cfg in hints:
+                        landed = found[cfg.name][1] if cfg.name in found else None
+                        scheduler.record(cfg.name, landed, costs[cfg.name].solver_calls)
+                elif store is not None:
+                    store.record_task(seed, index, accepted)
+                batch_accepted.extend(accepted)
+                report_progress(attempts, puzzles)
+                if telemetry is not None:
+                    telemetry.record_seed(attempts, {name: len(entries) for name, entries in puzzles.items()})
+            if store is not None and scheduler is not None:
+                counts = {
+                    name: (cost.stops, cost.solver_calls, cost.landed) for name, cost in scheduler.costs.items()
+                }
+                store.record_task(seed, attempts - 1, batch_accepted, counts)
+    if scheduler is not None:
+        print("Scheduler -> " + scheduler.summary())
+    return {cfg.name: puzzles[cfg.name][:target_per_level] for cfg in configs}
+
+
+def ultra_task(
+    seed: int,
+    index: int,
+    seconds: float,
+    solver: str = DEFAULT_SOLVER,
+    pool: Path | None = None,
+    budget: int | None = None,
+) -> Tuple[List[int], List[int] | None, bytes, CarveStats]:
+    solution = draw_solution(task_rng(seed, "ultra", index), pool)
+    stats = CarveStats()
+    started = time.perf_counter()
+    puzzle = make_ultra_puzzle(
+        solution,
+        seconds=seconds,
+        solver=solver,
+        rng=task_rng(seed, "ultra", index, "anneal"),
+        stats=stats,
+        budget=budget,
+    )
+    stats.seconds = time.perf_counter() - started
+    return solution, puzzle, dedupe_key(puzzle) if puzzle is not None else b"", stats
+
+
+def generate_ultra(
+    seed: int,
+    target: int,
+    seconds: float = ULTRA_SECONDS,
+    workers: int | None = None,
+    solver: str = DEFAULT_SOLVER,
+    telemetry: Telemetry | None = None,
+    pool: Path | None = None,
+    budget: int | None = None,
+) -> List[Tuple[List[int], List[int]]]:
+    # Seeded per task like generate_seeded, but every search stops on a
+    # wall-clock budget, so which solutions make it in (and how low they
+    # get) can differ between machines and between loaded and idle runs.
+    puzzles: List[Tuple[List[int], List[int]]] = []
+    seen: set[bytes] = set()
+    attempts = 0
+    batch_size = workers or 1
+    with ProcessPoolExecutor(max_workers=workers) if workers else nullcontext() as executor:
+        run = executor.map if executor is not None else map
+        while len(puzzles) < target:
+            indices = range(attempts, attempts + batch_size)
+            results = run(
+                ultra_task,
+                [seed] * batch_size,
+                indices,
+                [seconds] * batch_size,
+                [solver] * batch_size,
+                [pool] * batch_size,
+                [budget] * batch_size,
+            )
+            for solution, puzzle, key, stats in results:
+                attempts += 1
+                if telemetry is not None:
+                    telemetry.record_carve(
+                        "ultra",
+                        stats.solver_calls,
+                        stats.search_nodes,
+                        stats.propagated,
+                        stats.witness_hits,
+                        stats.budget_trips,
+                        stats.rejected,
+                        stats.seconds,
+                    )
+                if puzzle is None:
+                    continue
+                if len(puzzles) >= target:
+                    if telemetry is not None:
+                        telemetry.record_discarded("ultra")
+                    continue
+                if key in seen:
+                    if telemetry is not None:
+                        telemetry.record_duplicate("ultra")
+                    continue
+                seen.add(key)
+                puzzles.append((puzzle, solution[:]))
+                if telemetry is not None:
+                    telemetry.record_accepted("ultra")
+                if attempts % 25 == 0:
+                    print(f"Ultra progress after {attempts} seeds -> {len(puzzles)}")
+    return puzzles
+
+
+def parse_args(argv: Sequence[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate lib/puzzles.dart")
+    parser.add_argument(
+        "--size",
+        type=int,
+        choices=sorted(SHAPES),
+        default=CLASSIC.side,
+        help="grid side; sizes other than 9 go to lib/puzzles_NxN.dart",
+    )
+    parser.add_argument(
+        "--solver",
+        choices=sorted(SOLVERS),
+        help="uniqueness solver for every tier (default: per-tier choice)",
+    )
+    parser.add_argument(
+        "--carve",
+        choices=CARVE_STRATEGIES,
+        default="batched",
+        help="cell removal strategy (batched gives the same puzzles with fewer solver calls)",
+    )
+    parser.add_argument(
+        "--bucket",
+        choices=BUCKET_MODES,
+        help="fill tiers by human-technique rating or by givens count (default: rating on 9x9, givens otherwise)",
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=SCHEDULES,
+        default="quota",
+        help="chain-carve the tiers that are behind their quota, or sweep every tier per solution",
+    )
+    parser.add_argument(
+        "--grids",
+        choices=GRID_SOURCES,
+        default="pool",
+        help="draw solutions from the precomputed grid pool, or from the fixed-pattern shuffler",
+    )
+    parser.add_argument("--pool", type=Path, default=DEFAULT_POOL, help="grid pool file (built on first use)")
+    parser.add_argument(
+        "--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="grids to precompute when building the pool"
+    )
+    parser.add_argument(
+        "--node-budget",
+        type=int,
+        default=NODE_BUDGET_PER_CELL,
+        help="give up on a uniqueness check after N search nodes per cell and reject the removal (0: no limit)",
+    )
+    parser.add_argument("--seed", type=int, default=20240917, help="master random seed")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="spread solution seeds over N processes (per-task seeding)",
+    )
+    parser.add_argument(
+        "--target-per-level",
+        type=int,
+        help="grow the on-disk store to N puzzles per tier and emit lib/puzzles.dart from it",
+    )
+    parser.add_argument("--store", type=Path, help=f"puzzle store for --target-per-level (default: {DEFAULT_STORE})")
+    parser.add_argument(
+        "--format",
+        choices=OUTPUT_FORMATS,
+        default="dart",
+        help="emit lib/puzzles.dart, or a packed binary asset plus lib/puzzle_pack.dart loader",
+    )
+    parser.add_argument("--asset", type=Path, default=Path(DEFAULT_ASSET), help="binary asset path")
+    parser.add_argument(
+        "--omit-solutions",
+        action="store_true",
+        help="leave solutions out of the binary asset; the loader solves boards on demand",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="check the generated pack with the NumPy validator before writing it",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="count search nodes, rejections and duplicates per tier and print a summary",
+    )
+    parser.add_argument("--trace", type=Path, help="write per-seed telemetry as JSON lines (implies --stats)")
+    parser.add_argument(
+        "--ultra",
+        type=int,
+        default=0,
+        metavar="N",
+        help=f"also search for N puzzles with {ULTRA_GIVENS[0]}-{ULTRA_GIVENS[1]} givens and write {ULTRA_FILE}",
+    )
+    parser.add_argument(
+        "--ultra-seconds",
+        type=float,
+        default=ULTRA_SECONDS,
+        help="local-search time budget per ultra puzzle",
+    )
+
+    commands = parser.add_subparsers(dest="command")
+    validate = commands.add_parser("validate", help="check an existing puzzles.dart with the NumPy validator")
+    validate.add_argument("path", nargs="?", type=Path)
+    validate.add_argument(
+        "--size", type=int, choices=sorted(SHAPES), default=argparse.SUPPRESS, help="grid side of the pack"
+    )
+    validate.add_argument(
+        "--bucket",
+        choices=BUCKET_MODES,
+        help="how the pack was bucketed (rating packs are only checked against the overall givens range)",
+    )
+    solve = commands.add_parser(
+        "solve", help="count solutions of 16-, 36- or 81-character boards read line by line (blanks as 0 or .)"
+    )
+    solve.add_argument("path", nargs="?", default="-", help="input file, or - for stdin")
+    solve.add_argument("--limit", type=int, default=2, help="stop counting at N solutions")
+    solve.add_argument("--solver", choices=sorted(SOLVERS), default=DEFAULT_SOLVER)
+    solve.add_argument("--workers", type=int, help="spread boards over N processes")
+    solve.add_argument("--unique", action="store_true", help="only print boards with exactly one solution")
+    return parser.parse_args(argv)
+
+
+# Givens per tier for the other sizes, novice to master. The hardest tiers
+# sit a few givens above where greedy carving of random grids bottoms out
+# (about 4, 10, 47 and 93 givens), so they fill without near-minimal searches.
+VARIANT_GIVENS: Dict[int, List[Tuple[int, int]]] = {
+    4: [(10, 11), (8, 9), (7, 7), (6, 6), (5, 5)],
+    6: [(20, 22), (17, 19), (14, 16), (12, 13), (11, 11)],
+    12: [(80, 88), (70, 79), (62, 69), (56, 61), (52, 55)],
+    16: [(150, 160), (135, 149), (120, 134), (110, 119), (100, 109)],
+}
+
+
+def default_configs(shape: Shape = CLASSIC) -> List[DifficultyConfig]:
+    configs = [
+        DifficultyConfig("novice", "Difficulty.novice", (40, 45), (0, 19)),
+        DifficultyConfig("medium", "Difficulty.medium", (34, 39), (20, 59)),
+        DifficultyConfig("high", "Difficulty.high", (28, 33), (60, 99)),
+        DifficultyConfig("expert", "Difficulty.expert", (24, 27), (100, 249)),
+        DifficultyConfig("master", "Difficulty.master", (22, 23), (250, MAX_SCORE)),
+    ]
+    for cfg, givens in zip(configs, VARIANT_GIVENS.get(shape.side, [])):
+        cfg.givens = givens
+        cfg.shape = shape
+    return configs
+
+
+def givens_ranges(configs: List[DifficultyConfig], bucket: str) -> List[Tuple[int, int]]:
+    if bucket == "givens":
+        return [cfg.givens for cfg in configs]
+    overall = (min(cfg.givens[0] for cfg in configs), max(cfg.givens[1] for cfg in configs))
+    return [overall] * len(configs)
+
+
+def run_validation(
+    configs: List[DifficultyConfig],
+    bucket: str,
+    data: Dict[str, List[Tuple[List[int], List[int]]]] | None = None,
+    path: Path | None = None,
+) -> bool:
+    from pack_validator import load_dart_pack, pack_arrays, validate_pack
+
+    names = [cfg.name for cfg in configs]
+    shape = configs[0].shape
+    if data is None:
+        boards, solutions, tiers = load_dart_pack(path or output_file(shape), names, shape)
+    else:
+        boards, solutions, tiers = pack_arrays(data, names, shape)
+    problems = validate_pack(boards, solutions, tiers, names, givens_ranges(configs, bucket))
+    for problem in problems:
+        print("Validation failed -", problem)
+    if not problems:
+        print(f"Validated {len(boards)} puzzles")
+    return not problems
+
+
+def run_solve(args: argparse.Namespace) -> None:
+    from batch_solver import solve_stream
+
+    started = time.perf_counter()
+    with open(args.path, encoding="utf-8") if args.path != "-" else nullcontext(sys.stdin) as lines:
+        checked, unique = solve_stream(lines, sys.stdout, args.limit, args.solver, args.workers, args.unique)
+    elapsed = time.perf_counter() - started
+    print(f"Checked {checked} boards, {unique} unique, in {elapsed:.1f}s", file=sys.stderr)
+
+
+def store_settings(args: argparse.Namespace, bucket: str) -> Dict[str, str]:
+    # Everything that changes which puzzles a task accepts or where they go.
+    return {
+        "bucket": bucket,
+        "schedule": args.schedule,
+        "grids": args.grids,
+        "solver": args.solver or "per-tier",
+        "carve": args.carve,
+        "node_budget": str(args.node_budget),
+    }
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = parse_args(argv)
+    if args.command == "solve":
+        run_solve(args)
+        return
+    shape = SHAPES[args.size]
+    configs = default_configs(shape)
+    bucket = args.bucket or ("rating" if shape == CLASSIC else "givens")
+    if bucket == "rating" and shape != CLASSIC:
+        raise SystemExit("--bucket rating needs 9x9 grids: the grader only knows the classic units")
+    if args.command == "validate":
+        if not run_validation(configs, bucket, path=args.path):
+            raise SystemExit(1)
+        return
+    if args.format == "binary" and shape != CLASSIC:
+        raise SystemExit("--format binary stores nibble-packed 9x9 boards only")
+    if args.ultra and shape != CLASSIC:
+        raise SystemExit("--ultra targets 9x9 grids only")
+
+    for cfg in configs:
+        cfg.carve = args.carve
+        cfg.node_budget = args.node_budget
+        if args.solver:
+            cfg.solver = args.solver
+
+    pool = None
+    if args.grids == "pool":
+        pool = args.pool
+        if shape == CLASSIC:
+            ensure_pool(pool, args.pool_size)
+
+    solver_calls: Dict[str, List[int]] = {}
+    names = [cfg.name for cfg in configs] + (["ultra"] if args.ultra else [])
+    ultra: List[Tuple[List[int], List[int]]] = []
+    with Telemetry(names, args.trace) if args.stats or args.trace else nullcontext() as telemetry:
+        if args.target_per_level is not None:
+            store_path = args.store or (
+                DEFAULT_STORE if shape == CLASSIC else DEFAULT_STORE.with_name(f"puzzles_{shape.label}.sqlite3")
+            )
+            with PuzzleStore(store_path) as store:
+                try:
+                    store.bind_settings(store_settings(args, bucket))
+                except ValueError as error:
+                    raise SystemExit(f"{error}; pass another --store to generate with these settings")
+                puzzles = generate_seeded(
+                    args.seed,
+                    configs,
+                    args.target_per_level,
+                    args.workers,
+                    store,
+                    solver_calls,
+                    bucket,
+                    telemetry,
+                    args.schedule,
+                    pool,
+                )
+        elif args.workers or args.schedule == "quota":
+            puzzles = generate_seeded(
+                args.seed,
+                configs,
+                100,
+                args.workers,
+                solver_calls=solver_calls,
+                bucket=bucket,
+                telemetry=telemetry,
+                schedule=args.schedule,
+                pool=pool,
+            )
+        else:
+            puzzles = generate_serial(args.seed, configs, 100, solver_calls, bucket, telemetry, pool)
+        if args.ultra:
+            ultra = generate_ultra(
+                args.seed,
+                args.ultra,
+                args.ultra_seconds,
+                args.workers,
+                args.solver or DEFAULT_SOLVER,
+                telemetry,
+                pool,
+                args.node_budget * shape.cells or None,
+            )
+        if telemetry is not None:
+            filled = {name: len(entries) for name, entries in puzzles.items()}
+            if args.ultra:
+                filled["ultra"] = len(ultra)
+            for line in telemetry.summary(filled):
+                print("Stats -", line)
+    report_solver_calls(configs, solver_calls)
+    if args.validate and not run_validation(configs, bucket, data=puzzles):
+        raise SystemExit(1)
+
+    total = sum(len(v) for v in puzzles.values())
+    if args.format == "binary":
+        write_asset(puzzles, configs, args.asset, include_solutions=not args.omit_solutions)
+        print(f"Generated {args.asset} and {LOADER_FILE} with", total, "puzzles")
+    else:
+        write_output(puzzles, configs)
+        print(f"Generated {output_file(shape)} with", total, "puzzles")
+    if args.ultra:
+        write_ultra(ultra)
+        print(f"Generated {ULTRA_FILE} with", len(ultra), "puzzles")
 
 
 if __name__ == "__main__":
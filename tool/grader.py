@@ -0,0 +1,385 @@
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from bitmask_solver import ALL_DIGITS, BOARD_CELLS, CELL_UNITS, POPCOUNT, SIDE
+
+UNITS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(cell for cell in range(BOARD_CELLS) if unit in CELL_UNITS[cell]) for unit in range(3 * SIDE)
+)
+ROWS = UNITS[:SIDE]
+COLS = UNITS[SIDE : 2 * SIDE]
+BOXES = UNITS[2 * SIDE :]
+PEERS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(sorted({peer for unit in CELL_UNITS[cell] for peer in UNITS[unit]} - {cell}))
+    for cell in range(BOARD_CELLS)
+)
+PEER_SETS = tuple(frozenset(peers) for peers in PEERS)
+BITS = tuple(1 << digit for digit in range(SIDE))
+
+
+@dataclass(frozen=True)
+class Technique:
+    name: str
+    weight: int
+
+
+HIDDEN_SINGLE = Technique("hidden_single", 1)
+NAKED_SINGLE = Technique("naked_single", 2)
+LOCKED_CANDIDATES = Technique("locked_candidates", 6)
+NAKED_PAIR = Technique("naked_pair", 10)
+HIDDEN_PAIR = Technique("hidden_pair", 12)
+NAKED_TRIPLE = Technique("naked_triple", 15)
+HIDDEN_TRIPLE = Technique("hidden_triple", 18)
+X_WING = Technique("x_wing", 25)
+SWORDFISH = Technique("swordfish", 35)
+XY_WING = Technique("xy_wing", 40)
+SIMPLE_COLORING = Technique("simple_coloring", 45)
+XY_CHAIN = Technique("xy_chain", 55)
+BRUTE_FORCE = Technique("brute_force", 100)
+
+MAX_SCORE = BRUTE_FORCE.weight * 10 + 9
+
+
+@dataclass
+class Rating:
+    score: int
+    hardest: Technique
+    uses: Dict[str, int] = field(default_factory=dict)
+    solved: bool = True
+
+
+class Grid:
+    def __init__(self, board: Sequence[int]) -> None:
+        self.values = list(board)
+        self.cands = [ALL_DIGITS] * BOARD_CELLS
+        for cell, value in enumerate(board):
+            if value:
+                self.place(cell, value)
+
+    def place(self, cell: int, digit: int) -> None:
+        bit = BITS[digit - 1]
+        self.values[cell] = digit
+        self.cands[cell] = 0
+        cands = self.cands
+        for peer in PEERS[cell]:
+            cands[peer] &= ~bit
+
+    def eliminate(self, cells: Sequence[int], mask: int) -> bool:
+        cands = self.cands
+        changed = False
+        for cell in cells:
+            if cands[cell] & mask:
+                cands[cell] &= ~mask
+                changed = True
+        return changed
+
+    def solved(self) -> bool:
+        return 0 not in self.values
+
+
+def _digit_of(bit: int) -> int:
+    return bit.bit_length()
+
+
+def _positions(grid: Grid, unit: Sequence[int], bit: int) -> List[int]:
+    cands = grid.cands
+    return [cell for cell in unit if cands[cell] & bit]
+
+
+def hidden_single(grid: Grid) -> int:
+    cands = grid.cands
+    placed = 0
+    for unit in UNITS:
+        once = twice = 0
+        for cell in unit:
+            mask = cands[cell]
+            twice |= once & mask
+            once |= mask
+        singles = once & ~twice
+        while singles:
+            bit = singles & -singles
+            singles ^= bit
+            for cell in unit:
+                if cands[cell] & bit:
+                    grid.place(cell, _digit_of(bit))
+                    placed += 1
+                    break
+        if placed:
+            return placed
+    return placed
+
+
+def naked_single(grid: Grid) -> int:
+    cands = grid.cands
+    placed = 0
+    for cell in range(BOARD_CELLS):
+        mask = cands[cell]
+        if mask and POPCOUNT[mask] == 1:
+            grid.place(cell, _digit_of(mask))
+            placed += 1
+    return placed
+
+
+def locked_candidates(grid: Grid) -> int:
+    for box in BOXES:
+        box_cells = set(box)
+        for bit in BITS:
+            cells = _positions(grid, box, bit)
+            if len(cells) < 2:
+                continue
+            rows = {cell // SIDE for cell in cells}
+            cols = {cell % SIDE for cell in cells}
+            lines = [ROWS[row] for row in rows if len(rows) == 1] + [COLS[col] for col in cols if len(cols) == 1]
+            for line in lines:
+                if grid.eliminate([cell for cell in line if cell not in box_cells], bit):
+                    return 1
+    for line in ROWS + COLS:
+        for bit in BITS:
+            cells = _positions(grid, line, bit)
+            if len(cells) < 2:
+                continue
+            box_unit = CELL_UNITS[cells[0]][2]
+            if all(CELL_UNITS[cell][2] == box_unit for cell in cells):
+                line_cells = set(line)
+                if grid.eliminate([cell for cell in UNITS[box_unit] if cell not in line_cells], bit):
+                    return 1
+    return 0
+
+
+def _naked_subset(grid: Grid, size: int) -> int:
+    cands = grid.cands
+    for unit in UNITS:
+        open_cells = [cell for cell in unit if cands[cell] and POPCOUNT[cands[cell]] <= size]
+        for group in combinations(open_cells, size):
+            union = 0
+            for cell in group:
+                union |= cands[cell]
+            if POPCOUNT[union] != size:
+                continue
+            others = [cell for cell in unit if cell not in group]
+            if grid.eliminate(others, union):
+                return 1
+    return 0
+
+
+def _hidden_subset(grid: Grid, size: int) -> int:
+    cands = grid.cands
+    for unit in UNITS:
+        spots: Dict[int, int] = {}
+        for bit in BITS:
+            mask = 0
+            for slot, cell in enumerate(unit):
+                if cands[cell] & bit:
+                    mask |= 1 << slot
+            if 2 <= POPCOUNT[mask] <= size:
+                spots[bit] = mask
+        for digits in combinations(spots, size):
+            union = 0
+            keep = 0
+            for bit in digits:
+                union |= spots[bit]
+                keep |= bit
+            if POPCOUNT[union] != size:
+                continue
+            changed = False
+            for slot, cell in enumerate(unit):
+                if union >> slot & 1 and cands[cell] & ~keep:
+                    cands[cell] &= keep
+                    changed = True
+            if changed:
+                return 1
+    return 0
+
+
+def _fish(grid: Grid, size: int) -> int:
+    cands = grid.cands
+    for base, cover in ((ROWS, COLS), (COLS, ROWS)):
+        for bit in BITS:
+            lines: Dict[int, int] = {}
+            for index, line in enumerate(base):
+                mask = 0
+                for slot, cell in enumerate(line):
+                    if cands[cell] & bit:
+                        mask |= 1 << slot
+                if 2 <= POPCOUNT[mask] <= size:
+                    lines[index] = mask
+            for group in combinations(lines, size):
+                union = 0
+                for index in group:
+                    union |= lines[index]
+                if POPCOUNT[union] != size:
+                    continue
+                targets = [
+                    cell
+                    for slot in range(SIDE)
+                    if union >> slot & 1
+                    for offset, cell in enumerate(cover[slot])
+                    if offset not in group
+                ]
+                if grid.eliminate(targets, bit):
+                    return 1
+    return 0
+
+
+def naked_pair(grid: Grid) -> int:
+    return _naked_subset(grid, 2)
+
+
+def hidden_pair(grid: Grid) -> int:
+    return _hidden_subset(grid, 2)
+
+
+def naked_triple(grid: Grid) -> int:
+    return _naked_subset(grid, 3)
+
+
+def hidden_triple(grid: Grid) -> int:
+    return _hidden_subset(grid, 3)
+
+
+def x_wing(grid: Grid) -> int:
+    return _fish(grid, 2)
+
+
+def swordfish(grid: Grid) -> int:
+    return _fish(grid, 3)
+
+
+def xy_wing(grid: Grid) -> int:
+    cands = grid.cands
+    pairs = [cell for cell in range(BOARD_CELLS) if POPCOUNT[cands[cell]] == 2]
+    for pivot in pairs:
+        pivot_mask = cands[pivot]
+        wings = [cell for cell in PEERS[pivot] if POPCOUNT[cands[cell]] == 2 and cands[cell] != pivot_mask]
+        for first, second in combinations(wings, 2):
+            first_mask = cands[first]
+            second_mask = cands[second]
+            if not (first_mask & pivot_mask) or not (second_mask & pivot_mask):
+                continue
+            shared = first_mask & second_mask
+            if POPCOUNT[shared] != 1 or shared & pivot_mask:
+                continue
+            if (first_mask | second_mask) & pivot_mask != pivot_mask:
+                continue
+            targets = PEER_SETS[first] & PEER_SETS[second]
+            if grid.eliminate([cell for cell in targets if cell != pivot], shared):
+                return 1
+    return 0
+
+
+def simple_coloring(grid: Grid) -> int:
+    for bit in BITS:
+        links: Dict[int, List[int]] = {}
+        for unit in UNITS:
+            cells = _positions(grid, unit, bit)
+            if len(cells) == 2:
+                first, second = cells
+                links.setdefault(first, []).append(second)
+                links.setdefault(second, []).append(first)
+        colored: Dict[int, int] = {}
+        for start in links:
+            if start in colored:
+                continue
+            groups: Tuple[List[int], List[int]] = ([], [])
+            colored[start] = 0
+            stack = [start]
+            while stack:
+                cell = stack.pop()
+                groups[colored[cell]].append(cell)
+                for other in links[cell]:
+                    if other not in colored:
+                        colored[other] = 1 - colored[cell]
+                        stack.append(other)
+            for color in (0, 1):
+                cells = groups[color]
+                if any(b in PEER_SETS[a] for a, b in combinations(cells, 2)):
+                    if grid.eliminate(cells, bit):
+                        return 1
+            component = set(groups[0]) | set(groups[1])
+            targets = [
+                cell
+                for cell in range(BOARD_CELLS)
+                if cell not in component
+                and grid.cands[cell] & bit
+                and any(other in PEER_SETS[cell] for other in groups[0])
+                and any(other in PEER_SETS[cell] for other in groups[1])
+            ]
+            if grid.eliminate(targets, bit):
+                return 1
+    return 0
+
+
+# A chain of bivalue cells, each a peer of the next and sharing the digit
+# that links them: if the first cell is not `digit`, every link forces the
+# next cell, and the last one becomes `digit`. Either end is then `digit`,
+# so cells that see both ends lose it. The search is a breadth-first walk
+# over (cell, digit forced true) states from every bivalue start.
+def xy_chain(grid: Grid) -> int:
+    cands = grid.cands
+    pairs = [cell for cell in range(BOARD_CELLS) if POPCOUNT[cands[cell]] == 2]
+    pair_set = set(pairs)
+    for start in pairs:
+        for bit in BITS:
+            if not cands[start] & bit:
+                continue
+            first = cands[start] & ~bit
+            visited = {(start, first)}
+            frontier = [(start, first)]
+            while frontier:
+                following = []
+                for cell, true_bit in frontier:
+                    for peer in PEERS[cell]:
+                        if peer not in pair_set or not cands[peer] & true_bit:
+                            continue
+                        state = (peer, cands[peer] & ~true_bit)
+                        if state in visited:
+                            continue
+                        visited.add(state)
+                        if state[1] == bit and peer != start:
+                            targets = PEER_SETS[start] & PEER_SETS[peer]
+                            if grid.eliminate([target for target in targets if target != peer], bit):
+                                return 1
+                        following.append(state)
+                frontier = following
+    return 0
+
+
+STRATEGIES: List[Tuple[Technique, Callable[[Grid], int]]] = [
+    (HIDDEN_SINGLE, hidden_single),
+    (NAKED_SINGLE, naked_single),
+    (LOCKED_CANDIDATES, locked_candidates),
+    (NAKED_PAIR, naked_pair),
+    (HIDDEN_PAIR, hidden_pair),
+    (NAKED_TRIPLE, naked_triple),
+    (HIDDEN_TRIPLE, hidden_triple),
+    (X_WING, x_wing),
+    (SWORDFISH, swordfish),
+    (XY_WING, xy_wing),
+    (SIMPLE_COLORING, simple_coloring),
+    (XY_CHAIN, xy_chain),
+]
+
+
+def rate(board: Sequence[int]) -> Rating:
+    # Always applies the easiest technique that makes progress, so the
+    # hardest one recorded is the hardest a human solver actually needs.
+    grid = Grid(board)
+    uses: Dict[str, int] = {}
+    hardest = HIDDEN_SINGLE
+    while not grid.solved():
+        for technique, apply in STRATEGIES:
+            steps = apply(grid)
+            if steps:
+                uses[technique.name] = uses.get(technique.name, 0) + steps
+                if technique.weight > hardest.weight:
+                    hardest = technique
+                break
+        else:
+            uses[BRUTE_FORCE.name] = 1
+            return Rating(score(BRUTE_FORCE, uses), BRUTE_FORCE, uses, solved=False)
+    return Rating(score(hardest, uses), hardest, uses)
+
+
+def score(hardest: Technique, uses: Dict[str, int]) -> int:
+    return hardest.weight * 10 + min(uses.get(hardest.name, 0), 9)
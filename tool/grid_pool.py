@@ -0,0 +1,149 @@
+import mmap
+import random
+import struct
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Sequence
+
+from bitmask_solver import CLASSIC, Shape, cell_units, popcounts
+from puzzle_asset import PACKED_BOARD, pack_board, unpack_board
+
+# Pool file: magic "SDKG", version u8, grid count u32, then one nibble-packed
+# grid per PACKED_BOARD bytes (the same record layout as the puzzle asset).
+MAGIC = b"SDKG"
+VERSION = 1
+HEADER = struct.Struct("<4sBI")
+
+DEFAULT_POOL = Path("tool/grid_pool.bin")
+DEFAULT_POOL_SIZE = 20000
+POOL_SEED = 20240917
+RESTART_NODES_PER_CELL = 10
+
+
+def random_grid(rng: random.Random, shape: Shape = CLASSIC) -> List[int]:
+    # MRV backtracking from an empty board that tries candidates in random
+    # order, so every valid grid can come out, not just relabellings of one
+    # base pattern. A classic fill takes about 90 nodes; 16x16 fills
+    # sometimes paint themselves into a corner that takes seconds to back
+    # out of, so a fill running past its node budget starts over.
+    while True:
+        grid = _fill(rng, shape, RESTART_NODES_PER_CELL * shape.cells)
+        if grid is not None:
+            return grid
+
+
+def _fill(rng: random.Random, shape: Shape, budget: int) -> List[int] | None:
+    side = shape.side
+    cells = shape.cells
+    all_digits = shape.all_digits
+    units = cell_units(shape)
+    popcount = popcounts(shape)
+    used = [0] * (3 * side)
+    values = [0] * cells
+    empties = list(range(cells))
+
+    nodes = 0
+
+    def search(depth: int) -> bool:
+        nonlocal nodes
+        nodes += 1
+        if nodes > budget:
+            return False
+        if depth == cells:
+            return True
+        best_slot = -1
+        best_free = 0
+        best_size = side + 1
+        for slot in range(depth, cells):
+            row, col, box = units[empties[slot]]
+            free = all_digits ^ (used[row] | used[col] | used[box])
+            size = popcount[free]
+            if size < best_size:
+                if size == 0:
+                    return False
+                best_slot = slot
+                best_free = free
+                best_size = size
+                if size == 1:
+                    break
+
+        cell = empties[best_slot]
+        empties[best_slot] = empties[depth]
+        empties[depth] = cell
+        row, col, box = units[cell]
+        bits = [1 << digit for digit in range(side) if best_free >> digit & 1]
+        rng.shuffle(bits)
+        for bit in bits:
+            values[cell] = bit.bit_length()
+            used[row] |= bit
+            used[col] |= bit
+            used[box] |= bit
+            if search(depth + 1):
+                return True
+            used[row] ^= bit
+            used[col] ^= bit
+            used[box] ^= bit
+        values[cell] = 0
+        return False
+
+    return values if search(0) else None
+
+
+def random_transform(grid: Sequence[int], rng: random.Random, shape: Shape = CLASSIC) -> List[int]:
+    # A random element of the validity-preserving symmetry group (see
+    # canonical.py): band/stack and row/column permutations, a transpose when
+    # the boxes are square, and a digit relabelling.
+    def lines(groups: int, size: int) -> List[int]:
+        return [group * size + line for group in rng.sample(range(groups), groups) for line in rng.sample(range(size), size)]
+
+    side = shape.side
+    rows = lines(shape.box_cols, shape.box_rows)
+    cols = lines(shape.box_rows, shape.box_cols)
+    digits = [0] + rng.sample(range(1, side + 1), side)
+    if shape.box_rows == shape.box_cols and rng.random() < 0.5:
+        return [digits[grid[col * side + row]] for row in rows for col in cols]
+    return [digits[grid[row * side + col]] for row in rows for col in cols]
+
+
+def pool_chunks(size: int = DEFAULT_POOL_SIZE, seed: int = POOL_SEED) -> Iterator[bytes]:
+    rng = random.Random(seed)
+    yield HEADER.pack(MAGIC, VERSION, size)
+    for _ in range(size):
+        yield pack_board(random_grid(rng))
+
+
+def build_pool(path: Path = DEFAULT_POOL, size: int = DEFAULT_POOL_SIZE, seed: int = POOL_SEED) -> None:
+    # Writes in place; the generator builds its pool through atomic_write so
+    # an interrupted build never leaves a short file behind.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        handle.writelines(pool_chunks(size, seed))
+
+
+class GridPool:
+    def __init__(self, path: Path = DEFAULT_POOL) -> None:
+        with path.open("rb") as handle:
+            if path.stat().st_size < HEADER.size:
+                raise ValueError(f"{path} is truncated")
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a grid pool")
+        if len(self.data) < HEADER.size + self.size * PACKED_BOARD:
+            raise ValueError(f"{path} is truncated")
+
+    def close(self) -> None:
+        self.data.close()
+
+    def grid(self, index: int) -> List[int]:
+        return unpack_board(self.data, HEADER.size + index * PACKED_BOARD)
+
+    def draw(self, rng: random.Random) -> List[int]:
+        # Only the picked grid is decoded; the pool stays in the page cache.
+        return random_transform(self.grid(rng.randrange(self.size)), rng)
+
+
+@lru_cache(maxsize=None)
+def open_pool(path: Path = DEFAULT_POOL) -> GridPool:
+    # One mapping per process, shared by every task that process runs.
+    return GridPool(path)
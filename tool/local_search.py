@@ -0,0 +1,79 @@
+import math
+import random
+import time
+from typing import Callable, List, Sequence, Tuple
+
+ULTRA_GIVENS = (17, 21)
+ULTRA_SECONDS = 10.0
+START_TEMPERATURE = 0.5
+
+
+# Simulated annealing over given sets, for boards below where one greedy
+# carve bottoms out (22-26 givens on the classic grid). It starts from a
+# minimal board carved in random order, and the board stays unique after
+# every move. A move picks a random given and
+#   - drops it if the board stays unique (one given fewer), or else
+#   - swaps it for a random blank if that keeps the board unique (same
+#     count, a new neighbourhood to drop from), or else
+#   - keeps the blank filled in anyway with probability exp(-1 / T): one
+#     given more, which lets the walk climb out of a local minimum.
+# Filling in a blank cannot break uniqueness, so only removals are checked,
+# and `count` (make_puzzle's witness-backed counter) turns most failing
+# removals down without a search. T falls linearly to zero over the time
+# budget. Since that budget is wall-clock time, how low a run gets depends
+# on the machine. The target is drawn from givens_range; when the budget
+# runs out first, the best board found is returned if it is in range.
+def anneal_puzzle(
+    solution: Sequence[int],
+    givens_range: Tuple[int, int],
+    count: Callable[..., int],
+    rng: random.Random,
+    seconds: float = ULTRA_SECONDS,
+) -> List[int] | None:
+    board = list(solution)
+    order = list(range(len(board)))
+    rng.shuffle(order)
+    for pos in order:
+        board[pos] = 0
+        if count(board, limit=2) != 1:
+            board[pos] = solution[pos]
+    givens = [pos for pos in range(len(board)) if board[pos]]
+    blanks = [pos for pos in range(len(board)) if not board[pos]]
+    best = board[:]
+    best_count = len(givens)
+
+    target = rng.randint(givens_range[0], givens_range[1])
+    started = time.perf_counter()
+    while len(givens) > target:
+        elapsed = time.perf_counter() - started
+        if elapsed >= seconds:
+            break
+        temperature = START_TEMPERATURE * (1 - elapsed / seconds)
+        slot = rng.randrange(len(givens))
+        pos = givens[slot]
+        board[pos] = 0
+        if count(board, limit=2) == 1:
+            givens[slot] = givens[-1]
+            givens.pop()
+            blanks.append(pos)
+            if len(givens) < best_count:
+                best = board[:]
+                best_count = len(givens)
+            continue
+
+        blank_slot = rng.randrange(len(blanks))
+        fill = blanks[blank_slot]
+        board[fill] = solution[fill]
+        if count(board, limit=2) == 1:
+            givens[slot] = fill
+            blanks[blank_slot] = pos
+            continue
+        board[pos] = solution[pos]
+        if rng.random() < math.exp(-1 / max(temperature, 1e-9)):
+            givens.append(fill)
+            blanks[blank_slot] = blanks[-1]
+            blanks.pop()
+        else:
+            board[fill] = 0
+
+    return best if best_count <= givens_range[1] else None
@@ -0,0 +1,90 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from bitmask_solver import CLASSIC, SHAPES_BY_CELLS, Shape
+
+TIER_PATTERN = re.compile(r"^  Difficulty\.(\w+): \[$(.*?)^  \],$", re.MULTILINE | re.DOTALL)
+
+
+def pack_arrays(
+    data: Dict[str, List[Tuple[List[int], List[int]]]], names: Sequence[str], shape: Shape = CLASSIC
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    boards = [board for name in names for board, _ in data.get(name, [])]
+    solutions = [solution for name in names for _, solution in data.get(name, [])]
+    tiers = np.repeat(np.arange(len(names)), [len(data.get(name, [])) for name in names])
+    return (
+        np.array(boards, dtype=np.uint8).reshape(-1, shape.cells),
+        np.array(solutions, dtype=np.uint8).reshape(-1, shape.cells),
+        tiers,
+    )
+
+
+def load_dart_pack(
+    path: Path, names: Sequence[str], shape: Shape = CLASSIC
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    text = path.read_text(encoding="utf-8")
+    chunks: List[np.ndarray] = []
+    counts: List[int] = []
+    sections = {match.group(1): match.group(2) for match in TIER_PATTERN.finditer(text)}
+    for name in names:
+        section = sections.get(name, "")
+        if shape.side <= 9:
+            digits = re.sub(r"[^0-9]", "", section)
+            values = np.frombuffer(digits.encode("ascii"), dtype=np.uint8) - ord("0")
+        else:
+            values = np.array(re.findall(r"\d+", section), dtype=np.uint8)
+        pairs = values.reshape(-1, 2, shape.cells)
+        chunks.append(pairs)
+        counts.append(len(pairs))
+    pairs = np.concatenate(chunks) if chunks else np.zeros((0, 2, shape.cells), dtype=np.uint8)
+    return pairs[:, 0], pairs[:, 1], np.repeat(np.arange(len(names)), counts)
+
+
+def _unit_views(grids: np.ndarray, shape: Shape) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    side = shape.side
+    rows = grids.reshape(-1, side, side)
+    cols = rows.transpose(0, 2, 1)
+    boxes = (
+        rows.reshape(-1, shape.box_cols, shape.box_rows, shape.box_rows, shape.box_cols)
+        .transpose(0, 1, 3, 2, 4)
+        .reshape(-1, side, side)
+    )
+    return rows, cols, boxes
+
+
+def validate_pack(
+    boards: np.ndarray,
+    solutions: np.ndarray,
+    tiers: np.ndarray,
+    names: Sequence[str],
+    givens_ranges: Sequence[Tuple[int, int]],
+) -> List[str]:
+    problems: List[str] = []
+    shape = SHAPES_BY_CELLS.get(solutions.shape[1], CLASSIC)
+
+    def report(label: str, bad: np.ndarray) -> None:
+        indices = np.flatnonzero(bad)
+        if len(indices):
+            sample = ", ".join(f"{names[tiers[i]]}#{i - np.searchsorted(tiers, tiers[i])}" for i in indices[:5])
+            problems.append(f"{label}: {len(indices)} puzzle(s), e.g. {sample}")
+
+    in_range = (solutions >= 1) & (solutions <= shape.side)
+    report("solution digit out of range", ~in_range.all(axis=1))
+
+    masks = np.left_shift(np.uint16(1), np.where(in_range, solutions, 1).astype(np.uint16) - 1)
+    complete = np.ones(len(solutions), dtype=bool)
+    for units in _unit_views(masks, shape):
+        complete &= (np.bitwise_or.reduce(units, axis=2) == shape.all_digits).all(axis=1)
+    report("solution is not a valid grid", ~complete)
+
+    report("board disagrees with solution", ((boards != 0) & (boards != solutions)).any(axis=1))
+
+    ranges = np.array(givens_ranges, dtype=np.int64).reshape(-1, 2)
+    givens = np.count_nonzero(boards, axis=1)
+    low = ranges[tiers, 0]
+    high = ranges[tiers, 1]
+    report("givens outside tier range", (givens < low) | (givens > high))
+    return problems
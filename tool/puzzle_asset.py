@@ -0,0 +1,240 @@
+import struct
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+from bitmask_solver import BOARD_CELLS
+
+# Layout (little endian):
+#   header      magic "SDKP", version u8, flags u8, tier count u16
+#   tier table  per tier: name length u8, ASCII enum name, count u32, offset u32
+#   records     per puzzle: board nibbles, then solution nibbles if FLAG_SOLUTIONS
+# Boards pack two cells per byte (first cell in the high nibble), so a record
+# is 41 bytes, or 82 with the solution, and puzzle i of a tier starts at
+# offset + i * record size.
+MAGIC = b"SDKP"
+VERSION = 1
+FLAG_SOLUTIONS = 0x01
+PACKED_BOARD = (BOARD_CELLS + 1) // 2
+HEADER = struct.Struct("<4sBBH")
+TIER_ENTRY = struct.Struct("<II")
+
+DEFAULT_ASSET = "assets/data/puzzles.bin"
+
+
+def pack_board(board: Sequence[int]) -> bytes:
+    cells = list(board) + [0] * (PACKED_BOARD * 2 - len(board))
+    return bytes((cells[i] << 4) | cells[i + 1] for i in range(0, len(cells), 2))
+
+
+def unpack_board(data: bytes, offset: int = 0) -> List[int]:
+    cells: List[int] = []
+    for byte in data[offset : offset + PACKED_BOARD]:
+        cells.append(byte >> 4)
+        cells.append(byte & 0x0F)
+    return cells[:BOARD_CELLS]
+
+
+def encode_asset(
+    tiers: Sequence[Tuple[str, Sequence[Tuple[Sequence[int], Sequence[int]]]]],
+    include_solutions: bool = True,
+) -> Iterator[bytes]:
+    record_size = PACKED_BOARD * (2 if include_solutions else 1)
+    names = [name.encode("ascii") for name, _ in tiers]
+    table_size = sum(1 + len(name) + TIER_ENTRY.size for name in names)
+    flags = FLAG_SOLUTIONS if include_solutions else 0
+    yield HEADER.pack(MAGIC, VERSION, flags, len(tiers))
+
+    offset = HEADER.size + table_size
+    for name, (_, entries) in zip(names, tiers):
+        yield bytes([len(name)]) + name + TIER_ENTRY.pack(len(entries), offset)
+        offset += len(entries) * record_size
+
+    for _, entries in tiers:
+        for board, solution in entries:
+            if include_solutions:
+                yield pack_board(board) + pack_board(solution)
+            else:
+                yield pack_board(board)
+
+
+def read_index(data: bytes) -> Tuple[bool, Dict[str, Tuple[int, int]]]:
+    magic, version, flags, tier_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a puzzle pack asset")
+    index: Dict[str, Tuple[int, int]] = {}
+    position = HEADER.size
+    for _ in range(tier_count):
+        length = data[position]
+        name = data[position + 1 : position + 1 + length].decode("ascii")
+        position += 1 + length
+        index[name] = TIER_ENTRY.unpack_from(data, position)
+        position += TIER_ENTRY.size
+    return bool(flags & FLAG_SOLUTIONS), index
+
+
+def read_puzzle(data: bytes, tier: str, position: int) -> Tuple[List[int], List[int] | None]:
+    has_solutions, index = read_index(data)
+    count, offset = index[tier]
+    if not 0 <= position < count:
+        raise IndexError(f"{tier} has {count} puzzles")
+    record_size = PACKED_BOARD * (2 if has_solutions else 1)
+    start = offset + position * record_size
+    board = unpack_board(data, start)
+    return board, unpack_board(data, start + PACKED_BOARD) if has_solutions else None
+
+
+DART_LOADER = """// GENERATED CODE - DO NOT MODIFY BY HAND.
+// Сгенерировано tool/generate_puzzles.py --format binary.
+import 'dart:typed_data';
+
+import 'package:flutter/services.dart' show rootBundle;
+
+import 'models.dart';
+import 'puzzle.dart';
+
+/// Упакованный набор головоломок. Файл нужно перечислить в `assets`
+/// в pubspec.yaml.
+const String puzzlePackAsset = '{asset}';
+
+const int _packedBoardBytes = {packed};
+const int _flagSolutions = {flag};
+
+/// Набор судоку из бинарного ассета: 4 бита на клетку и индекс смещений по
+/// уровням сложности. Головоломки декодируются по одной при обращении.
+class PuzzlePack {{
+  PuzzlePack._(this._data, this._recordSize, this._hasSolutions, this._tiers);
+
+  final ByteData _data;
+  final int _recordSize;
+  final bool _hasSolutions;
+  final Map<Difficulty, ({{int count, int offset}})> _tiers;
+
+  static Future<PuzzlePack> load([String asset = puzzlePackAsset]) async {{
+    return PuzzlePack.fromByteData(await rootBundle.load(asset));
+  }}
+
+  factory PuzzlePack.fromByteData(ByteData data) {{
+    const magic = [0x53, 0x44, 0x4B, 0x50]; // "SDKP"
+    for (var i = 0; i < magic.length; i++) {{
+      if (data.getUint8(i) != magic[i]) {{
+        throw const FormatException('Неизвестный формат набора головоломок.');
+      }}
+    }}
+    if (data.getUint8(4) != {version}) {{
+      throw const FormatException('Неподдерживаемая версия набора головоломок.');
+    }}
+    final hasSolutions = (data.getUint8(5) & _flagSolutions) != 0;
+    final tierCount = data.getUint16(6, Endian.little);
+    final tiers = <Difficulty, ({{int count, int offset}})>{{}};
+    var position = 8;
+    for (var i = 0; i < tierCount; i++) {{
+      final length = data.getUint8(position);
+      final name = String.fromCharCodes(
+        data.buffer.asUint8List(data.offsetInBytes + position + 1, length),
+      );
+      position += 1 + length;
+      final count = data.getUint32(position, Endian.little);
+      final offset = data.getUint32(position + 4, Endian.little);
+      position += 8;
+      for (final difficulty in Difficulty.values) {{
+        if (difficulty.name == name) {{
+          tiers[difficulty] = (count: count, offset: offset);
+        }}
+      }}
+    }}
+    final recordSize = _packedBoardBytes * (hasSolutions ? 2 : 1);
+    return PuzzlePack._(data, recordSize, hasSolutions, tiers);
+  }}
+
+  /// Количество головоломок уровня [difficulty].
+  int count(Difficulty difficulty) => _tiers[difficulty]?.count ?? 0;
+
+  /// Декодирует головоломку [index] уровня [difficulty]. Если решения не
+  /// упакованы в ассет, решение вычисляется на месте.
+  Puzzle puzzle(Difficulty difficulty, int index) {{
+    final tier = _tiers[difficulty];
+    if (tier == null) {{
+      throw RangeError('Нет головоломок уровня ${{difficulty.name}}.');
+    }}
+    RangeError.checkValidIndex(index, null, 'index', tier.count);
+    final start = tier.offset + index * _recordSize;
+    final board = _unpack(start);
+    final solution =
+        _hasSolutions ? _unpack(start + _packedBoardBytes) : _solve(board);
+    return Puzzle(board, solution);
+  }}
+
+  List<int> _unpack(int start) {{
+    final cells = List<int>.filled(81, 0);
+    for (var i = 0; i < 81; i++) {{
+      final byte = _data.getUint8(start + (i >> 1));
+      cells[i] = i.isEven ? byte >> 4 : byte & 0x0F;
+    }}
+    return cells;
+  }}
+}}
+
+List<int> _solve(List<int> board) {{
+  final grid = List<int>.of(board);
+  final rows = List<int>.filled(9, 0);
+  final cols = List<int>.filled(9, 0);
+  final boxes = List<int>.filled(9, 0);
+  int boxOf(int cell) => (cell ~/ 27) * 3 + (cell % 9) ~/ 3;
+
+  void toggle(int cell, int bit) {{
+    rows[cell ~/ 9] ^= bit;
+    cols[cell % 9] ^= bit;
+    boxes[boxOf(cell)] ^= bit;
+  }}
+
+  for (var cell = 0; cell < 81; cell++) {{
+    if (grid[cell] != 0) {{
+      toggle(cell, 1 << (grid[cell] - 1));
+    }}
+  }}
+
+  bool search() {{
+    var best = -1;
+    var bestFree = 0;
+    var bestCount = 10;
+    for (var cell = 0; cell < 81 && bestCount > 1; cell++) {{
+      if (grid[cell] != 0) {{
+        continue;
+      }}
+      final free =
+          0x1FF & ~(rows[cell ~/ 9] | cols[cell % 9] | boxes[boxOf(cell)]);
+      var count = 0;
+      for (var bits = free; bits != 0; bits &= bits - 1) {{
+        count++;
+      }}
+      if (count < bestCount) {{
+        best = cell;
+        bestFree = free;
+        bestCount = count;
+      }}
+    }}
+    if (best < 0) {{
+      return true;
+    }}
+    for (var bits = bestFree; bits != 0; bits &= bits - 1) {{
+      final bit = bits & -bits;
+      grid[best] = bit.bitLength;
+      toggle(best, bit);
+      if (search()) {{
+        return true;
+      }}
+      toggle(best, bit);
+    }}
+    grid[best] = 0;
+    return false;
+  }}
+
+  if (!search()) {{
+    throw StateError('Головоломка не имеет решения.');
+  }}
+  return grid;
+}}
+"""
+
+
+def build_loader(asset: str = DEFAULT_ASSET) -> str:
+    return DART_LOADER.format(asset=asset, packed=PACKED_BOARD, flag=FLAG_SOLUTIONS, version=VERSION)
@@ -0,0 +1,196 @@
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Sequence, Set, Tuple
+
+from canonical import canonical_form
+
+DEFAULT_STORE = Path("tool/puzzles.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS puzzles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    board BLOB NOT NULL UNIQUE,
+    canonical BLOB UNIQUE,
+    solution BLOB NOT NULL,
+    tier TEXT NOT NULL,
+    givens INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    task INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS puzzles_tier ON puzzles (tier, id);
+CREATE TABLE IF NOT EXISTS progress (
+    seed INTEGER PRIMARY KEY,
+    next_task INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS schedule (
+    seed INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    stops INTEGER NOT NULL,
+    solver_calls INTEGER NOT NULL,
+    PRIMARY KEY (seed, tier)
+);
+CREATE TABLE IF NOT EXISTS landings (
+    seed INTEGER NOT NULL,
+    tier TEXT NOT NULL,
+    landing TEXT NOT NULL,
+    hits INTEGER NOT NULL,
+    PRIMARY KEY (seed, tier, landing)
+);
+CREATE TABLE IF NOT EXISTS settings (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def board_key(board: Sequence[int]) -> bytes:
+    return bytes(board)
+
+
+# Accepted puzzles are committed together with the task counter of their
+# master seed (and the quota scheduler's per-tier counters), so an
+# interrupted run resumes from the first unfinished task.
+class PuzzleStore:
+    def __init__(self, path: Path = DEFAULT_STORE) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        # Stores from before canonical dedupe get the column, its values and
+        # the unique index in one explicit transaction (sqlite3 would commit
+        # a bare ALTER TABLE on its own). Of puzzles that are equivalent
+        # under the symmetry group only the earliest is kept. The migration
+        # counts as done once a unique index covers the column.
+        if self._canonical_indexed():
+            return
+        columns = {row[1] for row in self.connection.execute("PRAGMA table_info(puzzles)")}
+        self.connection.execute("BEGIN IMMEDIATE")
+        with self.connection:
+            if "canonical" not in columns:
+                self.connection.execute("ALTER TABLE puzzles ADD COLUMN canonical BLOB")
+            seen = {
+                row[0]
+                for row in self.connection.execute("SELECT canonical FROM puzzles WHERE canonical IS NOT NULL")
+            }
+            updates = []
+            duplicates = []
+            rows = self.connection.execute("SELECT id, board FROM puzzles WHERE canonical IS NULL ORDER BY id")
+            for row_id, board in rows.fetchall():
+                canonical = canonical_form(board)
+                if canonical in seen:
+                    duplicates.append((row_id,))
+                else:
+                    seen.add(canonical)
+                    updates.append((canonical, row_id))
+            self.connection.executemany("DELETE FROM puzzles WHERE id = ?", duplicates)
+            self.connection.executemany("UPDATE puzzles SET canonical = ? WHERE id = ?", updates)
+            self.connection.execute("CREATE UNIQUE INDEX puzzles_canonical ON puzzles (canonical)")
+
+    def _canonical_indexed(self) -> bool:
+        for _, name, unique, *_ in self.connection.execute("PRAGMA index_list(puzzles)").fetchall():
+            columns = [row[2] for row in self.connection.execute(f"PRAGMA index_info({name})")]
+            if unique and columns == ["canonical"]:
+                return True
+        return False
+
+    def __enter__(self) -> "PuzzleStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def load(self) -> Dict[str, List[Tuple[List[int], List[int]]]]:
+        data: Dict[str, List[Tuple[List[int], List[int]]]] = {}
+        rows = self.connection.execute("SELECT tier, board, solution FROM puzzles ORDER BY id")
+        for tier, board, solution in rows:
+            data.setdefault(tier, []).append((list(board), list(solution)))
+        return data
+
+    # A store holds the output of one way of generating: puzzles bucketed by
+    # rating and by givens, or carved from different grids, must not end up
+    # in the same tiers, and the task counters only mean something for the
+    # settings they were reached with. The first run records its settings
+    # (stores from before this check adopt those of the run that opens
+    # them) and later runs must match them.
+    def bind_settings(self, settings: Dict[str, str]) -> None:
+        with self.connection:
+            stored = dict(self.connection.execute("SELECT name, value FROM settings").fetchall())
+            if not stored:
+                self.connection.executemany("INSERT INTO settings (name, value) VALUES (?, ?)", settings.items())
+                return
+        changed = [
+            f"{name} {stored.get(name, '(unset)')} (not {value})"
+            for name, value in settings.items()
+            if stored.get(name) != value
+        ]
+        if changed:
+            raise ValueError(f"{self.path} was filled with {', '.join(changed)}")
+
+    def canonical_keys(self) -> Set[bytes]:
+        return {row[0] for row in self.connection.execute("SELECT canonical FROM puzzles")}
+
+    def next_task(self, seed: int) -> int:
+        row = self.connection.execute("SELECT next_task FROM progress WHERE seed = ?", (seed,)).fetchone()
+        return row[0] if row else 0
+
+    def load_schedule(self, seed: int) -> Dict[str, Tuple[int, int, Dict[str, int]]]:
+        schedule: Dict[str, Tuple[int, int, Dict[str, int]]] = {}
+        rows = self.connection.execute("SELECT tier, stops, solver_calls FROM schedule WHERE seed = ?", (seed,))
+        for tier, stops, calls in rows:
+            schedule[tier] = (stops, calls, {})
+        rows = self.connection.execute("SELECT tier, landing, hits FROM landings WHERE seed = ?", (seed,))
+        for tier, landing, hits in rows:
+            if tier in schedule:
+                schedule[tier][2][landing] = hits
+        return schedule
+
+    def record_task(
+        self,
+        seed: int,
+        task: int,
+        accepted: Sequence[Tuple[str, List[int], List[int], bytes]],
+        schedule: Dict[str, Tuple[int, int, Dict[str, int]]] | None = None,
+    ) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO puzzles (board, canonical, solution, tier, givens, seed, task) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        board_key(board),
+                        canonical,
+                        board_key(solution),
+                        tier,
+                        sum(1 for v in board if v),
+                        seed,
+                        task,
+                    )
+                    for tier, board, solution, canonical in accepted
+                ],
+            )
+            self.connection.execute(
+                "INSERT INTO progress (seed, next_task) VALUES (?, ?) "
+                "ON CONFLICT (seed) DO UPDATE SET next_task = excluded.next_task",
+                (seed, task + 1),
+            )
+            if schedule:
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO schedule (seed, tier, stops, solver_calls) VALUES (?, ?, ?, ?)",
+                    [(seed, tier, stops, calls) for tier, (stops, calls, _) in schedule.items()],
+                )
+                self.connection.executemany(
+                    "INSERT OR REPLACE INTO landings (seed, tier, landing, hits) VALUES (?, ?, ?, ?)",
+                    [
+                        (seed, tier, landing, hits)
+                        for tier, (_, _, landed) in schedule.items()
+                        for landing, hits in landed.items()
+                    ],
+                )
@@ -0,0 +1,90 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence
+
+MAX_ROUNDS = 5
+
+
+@dataclass
+class TierCost:
+    stops: int = 0
+    solver_calls: int = 0
+    landed: Dict[str, int] = field(default_factory=dict)
+
+
+# Every task carves one chain per solution: the board accepted for an easier
+# tier is the starting point for the next harder one, so the cells removed
+# for novice are not removed again for medium, and so on. The scheduler
+# tracks, per tier a chain stop was carved for, its solver calls and which
+# tiers its puzzles landed in (always its own tier with givens buckets,
+# wherever the rating puts them otherwise). From that it plans each batch:
+#   - the work left for a tier is its missing puzzles (as a fraction of the
+#     quota) times the solver calls one more of its puzzles costs;
+#   - that work is split over the stops that supply the tier in proportion
+#     to their landing rate per solver call, and the stop with the most work
+#     gets MAX_ROUNDS make_puzzle rounds, the others proportionally fewer;
+#     the cheapest supplier of every unfilled tier gets at least one round,
+#     stops with too little work to round up to one get none;
+#   - a stop is planned for only as many tasks of the batch as the tiers it
+#     feeds still need at their current landing rates.
+class QuotaScheduler:
+    def __init__(self, names: Sequence[str], target: int) -> None:
+        self.names = list(names)
+        self.target = target
+        self.costs: Dict[str, TierCost] = {name: TierCost() for name in names}
+
+    def landing_rate(self, source: str, tier: str) -> float:
+        # One imaginary stop that landed where it was aimed seeds the rate.
+        cost = self.costs[source]
+        return (cost.landed.get(tier, 0) + (source == tier)) / (cost.stops + 1)
+
+    def stop_cost(self, source: str) -> float:
+        cost = self.costs[source]
+        return (cost.solver_calls + 1) / (cost.stops + 1)
+
+    def plan(self, filled: Dict[str, int], tasks: int) -> List[Dict[str, int]]:
+        missing = {
+            name: self.target - filled.get(name, 0) for name in self.names if filled.get(name, 0) < self.target
+        }
+        work = {name: 0.0 for name in self.names}
+        spans = {name: 0 for name in self.names}
+        suppliers: set[str] = set()
+        for tier, count in missing.items():
+            rates = {source: self.landing_rate(source, tier) for source in self.names}
+            yields = {source: rate / self.stop_cost(source) for source, rate in rates.items() if rate}
+            if not yields:
+                continue
+            best = max(yields.values())
+            suppliers.add(max(yields, key=yields.__getitem__))
+            need = count / self.target / best
+            span = math.ceil(count / sum(rates.values()))
+            for source, value in yields.items():
+                work[source] += need * value / sum(yields.values())
+                spans[source] = max(spans[source], span)
+
+        top = max(work.values())
+        rounds = {name: round(MAX_ROUNDS * work[name] / top) if top else 0 for name in self.names}
+        for name in suppliers:
+            rounds[name] = max(rounds[name], 1)
+        return [
+            {name: rounds[name] for name in self.names if rounds[name] and task < spans[name]}
+            for task in range(tasks)
+        ]
+
+    def record(self, source: str, landed: str | None, solver_calls: int) -> None:
+        cost = self.costs[source]
+        cost.stops += 1
+        cost.solver_calls += solver_calls
+        if landed is not None:
+            cost.landed[landed] = cost.landed.get(landed, 0) + 1
+
+    def summary(self) -> str:
+        parts = []
+        for name, cost in self.costs.items():
+            if cost.stops:
+                landed = sum(cost.landed.values())
+                parts.append(
+                    f"{name}: {cost.stops} stops, {landed / cost.stops:.0%} landed, "
+                    f"{self.stop_cost(name):.0f} calls/stop"
+                )
+        return ", ".join(parts)
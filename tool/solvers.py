@@ -0,0 +1,31 @@
+from typing import Dict, List, Protocol, Sequence
+
+import bitmask_solver
+import dlx_solver
+from bitmask_solver import SearchStats
+
+
+class Solver(Protocol):
+    def find_solutions(
+        self, board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+    ) -> List[List[int]] | None: ...
+
+    def count_solutions(
+        self, board: Sequence[int], limit: int = 2, stats: SearchStats | None = None, budget: int | None = None
+    ) -> int: ...
+
+    def solve(self, board: Sequence[int]) -> List[int] | None: ...
+
+
+SOLVERS: Dict[str, Solver] = {
+    "bitmask": bitmask_solver,
+    "dlx": dlx_solver,
+}
+DEFAULT_SOLVER = "bitmask"
+
+
+def get_solver(name: str) -> Solver:
+    try:
+        return SOLVERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown solver backend: {name}") from None
@@ -0,0 +1,116 @@
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Sequence, TextIO
+
+
+@dataclass
+class TierStats:
+    solver_calls: int = 0
+    search_nodes: int = 0
+    propagated: int = 0
+    witness_hits: int = 0
+    budget_trips: int = 0
+    rejected: int = 0
+    duplicates: int = 0
+    discarded: int = 0
+    accepted: int = 0
+    seconds: float = 0.0
+
+
+# Counters are keyed by the tier a puzzle was carved for, which is where its
+# cost was paid; with rating buckets it may still land in another tier.
+# Generation loops only touch a Telemetry when one was passed in, so runs
+# without --stats pay nothing beyond the solvers' own node counter.
+class Telemetry:
+    def __init__(self, names: Sequence[str], trace: Path | None = None) -> None:
+        self.tiers: Dict[str, TierStats] = {name: TierStats() for name in names}
+        self.started = time.perf_counter()
+        self.trace: TextIO | None = None
+        if trace is not None:
+            trace.parent.mkdir(parents=True, exist_ok=True)
+            self.trace = trace.open("w", encoding="utf-8")
+
+    def __enter__(self) -> "Telemetry":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.trace is not None:
+            self._emit({"event": "summary", "elapsed": self.elapsed(), "tiers": self.snapshot()})
+            self.trace.close()
+            self.trace = None
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def record_carve(
+        self,
+        name: str,
+        solver_calls: int,
+        search_nodes: int,
+        propagated: int,
+        witness_hits: int,
+        budget_trips: int,
+        rejected: int,
+        seconds: float,
+    ) -> None:
+        stats = self.tiers[name]
+        stats.solver_calls += solver_calls
+        stats.search_nodes += search_nodes
+        stats.propagated += propagated
+        stats.witness_hits += witness_hits
+        stats.budget_trips += budget_trips
+        stats.rejected += rejected
+        stats.seconds += seconds
+
+    def record_duplicate(self, name: str) -> None:
+        self.tiers[name].duplicates += 1
+
+    def record_discarded(self, name: str) -> None:
+        self.tiers[name].discarded += 1
+
+    def record_accepted(self, name: str) -> None:
+        self.tiers[name].accepted += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: asdict(stats) for name, stats in self.tiers.items()}
+
+    def record_seed(self, attempts: int, filled: Dict[str, int]) -> None:
+        if self.trace is not None:
+            self._emit(
+                {
+                    "event": "seed",
+                    "attempts": attempts,
+                    "elapsed": self.elapsed(),
+                    "filled": filled,
+                    "tiers": self.snapshot(),
+                }
+            )
+
+    def _emit(self, record: Dict[str, object]) -> None:
+        assert self.trace is not None
+        self.trace.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def summary(self, filled: Dict[str, int]) -> List[str]:
+        elapsed = self.elapsed()
+        lines = []
+        for name, stats in self.tiers.items():
+            per_puzzle = max(stats.accepted, 1)
+            rate = stats.accepted / stats.seconds if stats.seconds else 0.0
+            lines.append(
+                f"{name}: {filled.get(name, 0)} in pack, {stats.accepted} accepted, "
+                f"{stats.solver_calls / per_puzzle:.1f} solver calls and "
+                f"{stats.search_nodes / per_puzzle:.0f} search nodes per puzzle, "
+                f"{stats.propagated / max(stats.solver_calls, 1):.0%} of calls decided by propagation, "
+                f"{stats.witness_hits / per_puzzle:.1f} removals refuted by a cached second solution, "
+                f"{stats.budget_trips} budget trips, {stats.rejected} rejected carves, {stats.duplicates} duplicates, "
+                f"{stats.discarded} discarded, {rate:.1f} puzzles/s"
+            )
+        total = sum(stats.accepted for stats in self.tiers.values())
+        rate = total / elapsed if elapsed else 0.0
+        lines.append(f"total: {total} puzzles accepted in {elapsed:.1f}s ({rate:.1f} puzzles/s)")
+        return lines